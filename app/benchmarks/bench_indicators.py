@@ -0,0 +1,89 @@
+"""Benchmark the vectorized stochastic engine against the per-ticker pandas loop.
+
+Runs offline on a synthetic watchlist of daily bars and checks that both paths
+agree exactly before reporting timings. From the app directory:
+
+    python -m benchmarks.bench_indicators --tickers 500 1000 2000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import indicators
+
+
+def synthetic_frames(n_tickers: int, n_days: int = 22, seed: int = 0) -> dict:
+    '''one month of random-walk daily bars per ticker, shaped like market_data.download_ohlc output'''
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2026-01-30", periods=n_days)
+    frames = {}
+    for i in range(n_tickers):
+        close = 100 + np.cumsum(rng.normal(size=n_days))
+        spread = rng.random((2, n_days))
+        frames[f"T{i:04d}"] = pd.DataFrame({
+            "Open": close,
+            "High": close + spread[0],
+            "Low": close - spread[1],
+            "Close": close,
+            "Volume": rng.integers(1_000, 1_000_000, n_days).astype(float),
+        }, index=dates)
+    return frames
+
+
+def per_ticker(frames: dict) -> dict:
+    results = {}
+    for symbol, frame in frames.items():
+        k, d = indicators.latest_stochastic(frame)
+        zone = indicators.determine_zone(k, d)
+        results[symbol] = {"%K": k, "%D": d, "Zone": zone, "Decision": indicators.decide_action(zone)}
+    return results
+
+
+def vectorized(frames: dict) -> dict:
+    return indicators.records(indicators.stochastic_panel(*indicators.panel_from_frames(frames)))
+
+
+def best_of(func, arg, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def same(a: dict, b: dict) -> bool:
+    for symbol, expected in a.items():
+        actual = b[symbol]
+        for key in ("%K", "%D"):
+            if not (expected[key] == actual[key] or (np.isnan(expected[key]) and np.isnan(actual[key]))):
+                return False
+        if expected["Zone"] != actual["Zone"] or expected["Decision"] != actual["Decision"]:
+            return False
+    return True
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--tickers", type=int, nargs="+", default=[100, 500, 1000, 2000])
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    #"engine" times stochastic_panel on a prebuilt wide panel; "end to end" adds building it from frames
+    print(f"{'tickers':>8} {'per-ticker ms':>14} {'engine ms':>10} {'speedup':>8} {'end to end ms':>14} {'speedup':>8}")
+    for n in args.tickers:
+        frames = synthetic_frames(n)
+        if not same(per_ticker(frames), vectorized(frames)):
+            raise SystemExit(f"Results differ at {n} tickers")
+        panel = indicators.panel_from_frames(frames)
+        slow = best_of(per_ticker, frames, args.repeat)
+        engine = best_of(lambda p: indicators.stochastic_panel(*p), panel, args.repeat)
+        end_to_end = best_of(vectorized, frames, args.repeat)
+        print(f"{n:>8} {slow * 1000:>14.1f} {engine * 1000:>10.1f} {slow / engine:>7.1f}x "
+              f"{end_to_end * 1000:>14.1f} {slow / end_to_end:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
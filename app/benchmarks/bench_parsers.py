@@ -0,0 +1,289 @@
+"""Benchmark the scrapers' HTML parsing against saved page fixtures.
+
+Runs offline: every parser in parsers.py is fed a saved page from
+benchmarks/fixtures, so the timings cover parsing only, never network I/O.
+Each one is timed next to the original BeautifulSoup extraction
+(reference_parsers.py) under every installed tree builder, and its output is
+checked to be the same as the reference's with html.parser. Raw document parse
+times (no extraction) are reported for html.parser, lxml and selectolax as a
+baseline.
+
+Live pages don't always look like the saved ones (tables without <tbody>,
+omitted end tags, upper-case tags, CRLF and &nbsp;, comments), so every
+parser is also run on those MARKUP_VARIANTS of its fixture and must still
+return what the reference returns for the fixture itself.
+
+fixtures/manifest.json records where each fixture came from. --record saves
+the live pages, reruns the benchmark on them and writes parser_thresholds.json
+from those timings (THRESHOLD_HEADROOM x the best time); until then fixtures
+and thresholds are marked "synthetic" and --check says so. From the app
+directory:
+
+    python -m benchmarks.bench_parsers              # report
+    python -m benchmarks.bench_parsers --check      # exit 1 on a slow parser or a variant that changes the output
+    python -m benchmarks.bench_parsers --record     # re-record the fixtures and thresholds from the live sites (needs network)
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import re
+import time
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+import parsers
+import scrapers
+from benchmarks import reference_parsers
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+THRESHOLDS_FILE = Path(__file__).parent / "parser_thresholds.json"
+MANIFEST_FILE = FIXTURES_DIR / "manifest.json"
+#thresholds written by --record: this many times the best time on the recorded page
+THRESHOLD_HEADROOM = 3
+
+TICKER = "AAPL"
+
+#parser -> (function in parsers.py, extra arguments after the html)
+PARSERS = {
+    "congress": ("parse_congress_trades", (TICKER,)),
+    "market_beat": ("parse_market_beat", ()),
+    "insider": ("parse_insider_trades", ()),
+    "barchart": ("parse_barchart_opinion", (TICKER,)),
+    "american_bulls_recommended": ("parse_american_bulls_recommended", ()),
+    "american_bulls_signal": ("parse_american_bulls_signal", ()),
+}
+
+#parser -> (fixture file, source the page is fetched for, url it was recorded from)
+FIXTURES = {
+    "congress": ("quiverquant_congress.html", "congress", f"https://www.quiverquant.com/stock/{TICKER}/government/"),
+    "market_beat": ("marketbeat.html", "market_beat", f"https://www.marketbeat.com/stocks/NASDAQ/{TICKER}/"),
+    "insider": ("openinsider.html", "insider", f"http://openinsider.com/screener?s={TICKER}&fd=730&cnt=200&page=1"),
+    "barchart": ("barchart_opinion.html", "barchart", f"https://www.barchart.com/stocks/quotes/{TICKER}/opinion"),
+    "american_bulls_recommended": ("americanbulls_default.html", None, "https://www.americanbulls.com/Default.aspx?lang=en"),
+    "american_bulls_signal": ("americanbulls_signal.html", None,
+                              f"https://www.americanbulls.com/SignalPage.aspx?lang=en&Ticker={TICKER}"),
+}
+
+BS4_BACKENDS = ["html.parser", "lxml"]
+
+#markup the live sites may serve that the fixtures don't have; the parsers must return the same data
+MARKUP_VARIANTS = {
+    "no_tbody": lambda html: re.sub(r"</?tbody[^>]*>", "", html),
+    "no_end_tags": lambda html: re.sub(r"</(td|tr|th)>", "", html),
+    "upper_tags": lambda html: re.sub(r"<(/?)(table|tbody|tr|td|div|span|a)\b",
+                                      lambda m: "<" + m.group(1) + m.group(2).upper(), html),
+    "crlf_nbsp": lambda html: html.replace("\n", "\r\n").replace("</td>", "&nbsp;</td>"),
+    "comments": lambda html: html.replace("</td>", "<!-- --></td>"),
+}
+
+
+class NullLimiter:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def run_parser(name: str, html: str, backend: str):
+    '''one parse of the page: parsers.py for "selectolax", the BeautifulSoup reference otherwise'''
+    function, args = PARSERS[name]
+    if backend == "selectolax":
+        return getattr(parsers, function)(html, *args)
+    return getattr(reference_parsers, function)(html, *args, features=backend)
+
+
+def time_parser(name: str, html: str, backend: str, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run_parser(name, html, backend)
+        timings.append(time.perf_counter() - started)
+    return timings, result
+
+
+def document_parsers() -> dict:
+    '''full-document parse with no extraction, per installed backend'''
+    documents = {"html.parser": lambda html: BeautifulSoup(html, "html.parser")}
+    try:
+        import lxml.html
+        documents["lxml"] = lxml.html.fromstring
+    except ImportError:
+        pass
+    documents["selectolax"] = parsers.LexborHTMLParser
+    return documents
+
+
+def time_document(parse, html: str, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(html)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def load_fixture(name: str) -> str:
+    return (FIXTURES_DIR / FIXTURES[name][0]).read_text(encoding="utf-8")
+
+
+def load_manifest() -> dict:
+    return json.loads(MANIFEST_FILE.read_text())
+
+
+def synthetic_fixtures(names: list) -> list:
+    fixtures = load_manifest()["fixtures"]
+    return [name for name in names if fixtures.get(FIXTURES[name][0], {}).get("origin") != "recorded"]
+
+
+def installed_backends() -> list:
+    '''html.parser first: its reference output is what every backend is compared with'''
+    backends = []
+    for backend in BS4_BACKENDS:
+        try:
+            BeautifulSoup("<p></p>", backend)
+            backends.append(backend)
+        except Exception:
+            print(f"skipping {backend}: not installed")
+    return backends + ["selectolax"]
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:8.2f} ms"
+
+
+def check_variants(name: str, html: str, reference) -> list:
+    '''MARKUP_VARIANTS of the fixture on which the parser no longer returns the reference output'''
+    failed = []
+    for variant, rewrite in MARKUP_VARIANTS.items():
+        if run_parser(name, rewrite(html), "selectolax") != reference:
+            failed.append(variant)
+    return failed
+
+
+def benchmark(names: list, repeat: int):
+    '''best parse time in ms per (parser, backend) and the markup variants each parser fails; prints the report'''
+    backends = installed_backends()
+    documents = document_parsers()
+    best = {}
+    variant_failures = {}
+    for name in names:
+        html = load_fixture(name)
+        print(f"\n{name} ({FIXTURES[name][0]}, {len(html) / 1024:.0f} KB)")
+        reference = None
+        for backend in backends:
+            timings, result = time_parser(name, html, backend, repeat)
+            if reference is None:
+                reference = result
+            same = "same output" if result == reference else "OUTPUT DIFFERS from html.parser"
+            best.setdefault(name, {})[backend] = min(timings) * 1000
+            print(f"  parse  {backend:12s} best {ms(min(timings))}  median {ms(statistics.median(timings))}  {same}")
+        if not reference:
+            print(f"  WARNING: parser returned no data for the fixture: {str(reference)[:120]}")
+        failed = check_variants(name, html, reference)
+        if failed:
+            variant_failures[name] = failed
+        print(f"  markup variants: {'OUTPUT DIFFERS on ' + ', '.join(failed) if failed else 'same output on all'}")
+        for backend, parse in documents.items():
+            timings = time_document(parse, html, repeat)
+            print(f"  tree   {backend:12s} best {ms(min(timings))}  median {ms(statistics.median(timings))}")
+    return best, variant_failures
+
+
+def check(best: dict, variant_failures: dict) -> bool:
+    thresholds = json.loads(THRESHOLDS_FILE.read_text())
+    synthetic = synthetic_fixtures(list(best))
+    if synthetic:
+        print(f"\nWARNING: synthetic fixtures (not recorded pages) for {', '.join(synthetic)}; "
+              "run --record on a host with network access")
+    if load_manifest().get("thresholds") != "recorded":
+        print("WARNING: parser_thresholds.json was not set from recorded pages")
+    ok = True
+    for name, variants in variant_failures.items():
+        print(f"MISMATCH: {name} returns different data on markup variant(s) {', '.join(variants)}")
+        ok = False
+    for name, backends in best.items():
+        for backend, elapsed in backends.items():
+            limit = thresholds.get(name, {}).get(backend)
+            if limit is not None and elapsed > limit:
+                print(f"REGRESSION: {name} with {backend} took {elapsed:.2f} ms (threshold {limit} ms)")
+                ok = False
+    print("\nall parsers within thresholds" if ok else "\nparser regressions found")
+    return ok
+
+
+async def record(names: list):
+    '''save the live pages as fixtures, fetched the same way the scrapers fetch them'''
+    from browser_pool import pool
+    from http_client import http
+
+    manifest = load_manifest()
+    async with pool, http:
+        for name in names:
+            file, source, url = FIXTURES[name]
+            if source is None:
+                html = (await http.get(url)).text
+            else:
+                async with AsyncExitStack() as stack:
+                    fetcher = scrapers.make_fetcher(source, stack)
+                    html = await fetcher.fetch(url, source, NullLimiter())
+            (FIXTURES_DIR / file).write_text(html, encoding="utf-8")
+            manifest["fixtures"][file] = {
+                "origin": "recorded",
+                "url": url,
+                "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+            print(f"recorded {name}: {len(html) / 1024:.0f} KB -> {file}")
+    MANIFEST_FILE.write_text(json.dumps(manifest, indent=4) + "\n")
+
+
+def write_thresholds(best: dict):
+    '''thresholds from the timings on the recorded pages, one line per parser'''
+    thresholds = json.loads(THRESHOLDS_FILE.read_text())
+    for name, backends in best.items():
+        thresholds[name] = {backend: max(1, round(elapsed * THRESHOLD_HEADROOM)) for backend, elapsed in backends.items()}
+    lines = [f"    {json.dumps(name)}: {json.dumps(limits)}" for name, limits in thresholds.items()]
+    THRESHOLDS_FILE.write_text("{\n" + ",\n".join(lines) + "\n}\n")
+    manifest = load_manifest()
+    if not synthetic_fixtures(list(FIXTURES)):
+        manifest["thresholds"] = "recorded"
+        MANIFEST_FILE.write_text(json.dumps(manifest, indent=4) + "\n")
+    print(f"\nwrote {THRESHOLDS_FILE.name} ({THRESHOLD_HEADROOM}x the best times on the recorded pages)")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("parsers", nargs="*", help=f"parsers to run (default: all of {', '.join(FIXTURES)})")
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    arg_parser.add_argument("--check", action="store_true",
+                            help="fail if a parser exceeds its threshold or changes output on a markup variant")
+    arg_parser.add_argument("--record", action="store_true",
+                            help="re-record the fixtures from the live sites and set the thresholds from them")
+    args = arg_parser.parse_args()
+    names = args.parsers or list(FIXTURES)
+    unknown = [name for name in names if name not in FIXTURES]
+    if unknown:
+        arg_parser.error(f"unknown parser(s): {', '.join(unknown)}")
+
+    if args.record:
+        asyncio.run(record(names))
+        best, variant_failures = benchmark(names, args.repeat)
+        if variant_failures:
+            #a recorded page the parsers can't read: fix the parser before trusting its timings
+            check(best, variant_failures)
+            sys.exit(1)
+        write_thresholds(best)
+        return
+    best, variant_failures = benchmark(names, args.repeat)
+    if args.check and not check(best, variant_failures):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
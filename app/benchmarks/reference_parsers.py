@@ -0,0 +1,138 @@
+"""The scrapers' original BeautifulSoup extraction, kept as the reference.
+
+Same signatures and return values as the functions in parsers.py, so the
+benchmark can check the fast parsers give the same output on every fixture
+and show what they save. `features` picks BeautifulSoup's tree builder.
+"""
+import json
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from parsers import MARKET_BEAT_SECTIONS, calculate_delta_days
+
+
+def parse_barchart_opinion(html: str, ticker: str, features: str = "html.parser") -> Optional[Dict]:
+    soup = BeautifulSoup(html, features)
+    target_data = soup.find("div", {"class": "note-button"})
+    if not target_data:
+        return None
+    a_tag = target_data.find("a")
+    if not (a_tag and a_tag.has_attr("data-symbol")):
+        return None
+    crude_data = json.loads(a_tag["data-symbol"])
+    return {
+        "ticker": ticker,
+        "company": crude_data.get("symbolName"),
+        "lastPrice": crude_data.get("lastPrice"),
+        "percentChange": crude_data.get("percentChange"),
+        "priceChange": crude_data.get("priceChange"),
+        "opinion": crude_data.get("opinion"),
+    }
+
+
+def parse_congress_trades(html: str, ticker: str, features: str = "html.parser") -> List[Dict]:
+    soup = BeautifulSoup(html, features)
+    main_div = soup.select_one("div.content-item.item-overview.item-gov.content-item-active")
+    rows = main_div.select("table tbody tr") if main_div else []
+    trades = []
+    for row in rows:
+        if row.select_one("a.flex-column"):
+            cells = row.find_all("td")
+            if len(cells) >= 3:
+                name = cells[0].find("span").get_text(strip=True) if cells[0].find("span") else "N/A"
+                action = cells[1].find("span", class_="positive") or cells[1].find("span", class_="sale")
+                action = action.get_text(strip=True) if action else "N/A"
+                amount_span = cells[1].find("span", class_="font-12")
+                amount = amount_span.get_text(strip=True) if amount_span else "N/A"
+                date = cells[2].get_text(strip=True)
+                trades.append({"ticker": ticker, "name": name, "action": action, "amount": amount, "date": date})
+    return trades
+
+
+def parse_market_beat(html: str, features: str = "html.parser") -> Optional[Dict]:
+    soup = BeautifulSoup(html, features)
+    faq_div = soup.select_one("div#marketRankAccordion")
+    if not faq_div:
+        return None
+    extracted_data = {}
+    for item in faq_div.select("div.faq-item-wrapper"):
+        section = item.select_one("span.mr-title").get_text(strip=True)
+        score = item.select_one("span.mr-score").get_text(strip=True)
+        label = item.select_one("span.mr-stat-label").get_text(strip=True)
+        value = item.select_one("span.mr-stat").get_text(strip=True)
+        if section in MARKET_BEAT_SECTIONS:
+            extracted_data[section] = {"score": score, "label": label, "value": value}
+    return extracted_data
+
+
+def parse_insider_trades(html: str, features: str = "html.parser") -> List[Dict]:
+    soup = BeautifulSoup(html, features)
+    trades = []
+    for row in soup.select("table tbody tr"):
+        cells = row.select("td")
+        if len(cells) < 12:
+            continue
+        dayFiled = cells[1].select_one("a").get_text(strip=True) if cells[1].select_one("a") else None
+        if dayFiled is None:
+            continue
+        dayTraded = cells[2].get_text(strip=True)
+        trades.append({
+            "dayFiled": dayFiled,
+            "dayTraded": dayTraded,
+            "insiderName": cells[4].select_one("a").get_text(strip=True) if cells[4].select_one("a") else None,
+            "title": cells[5].get_text(strip=True),
+            "action": cells[6].get_text(strip=True),
+            "price": cells[7].get_text(strip=True),
+            "quantity": cells[8].get_text(strip=True),
+            "sharesOwned": cells[9].get_text(strip=True),
+            "deltaOwn": cells[10].get_text(strip=True),
+            "value": cells[11].get_text(strip=True),
+            "deltaDays": calculate_delta_days(dayFiled, dayTraded),
+        })
+    return trades
+
+
+def _clean_text(text):
+    return ' '.join(text.split()).replace("\n", "").replace("\r", "").strip()
+
+
+def parse_american_bulls_recommended(html: str, features: str = "html.parser") -> Optional[List[Dict]]:
+    soup = BeautifulSoup(html, features)
+    table = soup.find("table", class_="table-hover")
+    if not table:
+        return None
+    stock_data = []
+    for row in table.find_all("tr", class_="gridRows"):
+        date_div = row.find("div", id=lambda x: x and "Tarih" in x)
+        stock_a = row.find("a", class_="dxbs-hyperlink")
+        signal_div = row.find("div", id=lambda x: x and "gridlevel" in x)
+        buy_level_div = row.find("div", id=lambda x: x and "gridprice" in x)
+        close_price_div = row.find("div", id=lambda x: x and "gridclose" in x)
+        stock_data.append({
+            "Date": _clean_text(date_div.text) if date_div else "N/A",
+            "Stock Name": _clean_text(stock_a.text) if stock_a else "N/A",
+            "Signal": _clean_text(signal_div.text) if signal_div else "N/A",
+            "Buy Level": _clean_text(buy_level_div.text) if buy_level_div else "N/A",
+            "Close Price": _clean_text(close_price_div.text) if close_price_div else "N/A",
+        })
+    return stock_data
+
+
+def parse_american_bulls_signal(html: str, features: str = "html.parser") -> Optional[List[Dict]]:
+    soup = BeautifulSoup(html, features)
+    table = soup.find("table", id="Content_SignalHistory_SignalShortHistoryGrid_DXMainTable")
+    if not table or not table.find("tbody"):
+        return None
+    table_data = []
+    for row in table.find("tbody").find_all("tr"):
+        cells = row.find_all("td")
+        if len(cells) >= 5:
+            table_data.append({
+                "Date": cells[0].text.strip(),
+                "Price": cells[1].text.strip(),
+                "Signal": cells[2].text.strip(),
+                "Change%": cells[3].text.strip(),
+                "Value": cells[4].text.strip(),
+            })
+    return table_data
@@ -0,0 +1,253 @@
+"""App-lifetime Playwright browser pool shared by all scrapers.
+
+The FastAPI app starts the pool on startup and drains it on shutdown. Scrapers
+lease a page with ``async with pool.page(...) as page:``; every lease gets its
+own browser context (so user agents, cookies and viewports stay isolated) but
+all leases share one long-lived Chromium instead of launching a new one per
+request.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from playwright.async_api import async_playwright
+
+logger = logging.getLogger("browser_pool")
+
+#max number of pages (contexts) open at the same time across all scrapers
+MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "4"))
+#relaunch the browser after this many contexts to keep chromium's memory in check
+MAX_CONTEXTS_PER_BROWSER = int(os.getenv("BROWSER_POOL_MAX_CONTEXTS", "200"))
+#seconds between background health checks
+HEALTH_CHECK_INTERVAL = float(os.getenv("BROWSER_POOL_HEALTH_INTERVAL", "30"))
+
+
+class _BrowserHandle:
+    """One launched chromium plus the number of leases currently using it."""
+
+    def __init__(self, browser, generation: int):
+        self.browser = browser
+        self.generation = generation
+        self.active = 0
+        self.contexts = 0
+        self.retired = False
+
+    def is_healthy(self) -> bool:
+        return not self.retired and self.browser.is_connected()
+
+
+class BrowserPool:
+    def __init__(self, max_pages: int = MAX_PAGES,
+                 max_contexts_per_browser: int = MAX_CONTEXTS_PER_BROWSER,
+                 health_check_interval: float = HEALTH_CHECK_INTERVAL,
+                 headless: bool = True):
+        self.max_pages = max_pages
+        self.max_contexts_per_browser = max_contexts_per_browser
+        self.health_check_interval = health_check_interval
+        self.headless = headless
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._playwright = None
+        self._handle: Optional[_BrowserHandle] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+        #created up front so concurrent first leases can't each start playwright and a browser
+        self._start_lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._closing = False
+
+        #counters exposed through stats()
+        self._generation = 0
+        self._launches = 0
+        self._recycles = 0
+        self._crashes = 0
+        self._leases = 0
+        self._lease_errors = 0
+        self._lease_seconds = 0.0
+        self._waiting = 0
+        self._active = 0
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        '''start playwright and launch the first browser'''
+        if self.started:
+            return
+        async with self._start_lock:
+            if self.started:
+                return
+            self.loop = asyncio.get_running_loop()
+            self._semaphore = asyncio.Semaphore(self.max_pages)
+            self._launch_lock = asyncio.Lock()
+            self._idle = asyncio.Event()
+            self._idle.set()
+            self._closing = False
+            self._playwright = await async_playwright().start()
+            await self._ensure_browser()
+            if self.health_check_interval > 0:
+                self._health_task = asyncio.create_task(self._health_loop())
+            logger.info(f"Browser pool started (max_pages={self.max_pages})")
+
+    async def stop(self, timeout: float = 30):
+        '''wait for in-flight pages to finish (up to timeout), then close everything'''
+        if not self.started:
+            return
+        self._closing = True
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Browser pool drain timed out with {self._active} page(s) still open")
+
+        if self._handle:
+            await self._close_browser(self._handle)
+            self._handle = None
+        await self._playwright.stop()
+        self._playwright = None
+        self.loop = None
+        logger.info("Browser pool stopped")
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _launch(self) -> _BrowserHandle:
+        browser = await self._playwright.chromium.launch(headless=self.headless)
+        self._generation += 1
+        self._launches += 1
+        handle = _BrowserHandle(browser, self._generation)
+        browser.on("disconnected", lambda _: self._on_disconnected(handle))
+        logger.info(f"Launched browser generation {handle.generation}")
+        return handle
+
+    def _on_disconnected(self, handle: _BrowserHandle):
+        if not handle.retired and not self._closing:
+            self._crashes += 1
+            logger.warning(f"Browser generation {handle.generation} disconnected unexpectedly")
+
+    async def _close_browser(self, handle: _BrowserHandle):
+        handle.retired = True
+        try:
+            await handle.browser.close()
+        except Exception as e:
+            logger.warning(f"Error closing browser generation {handle.generation}: {e}")
+
+    async def _ensure_browser(self) -> _BrowserHandle:
+        '''return a healthy browser, relaunching it if it crashed or is due for recycling'''
+        async with self._launch_lock:
+            handle = self._handle
+            if handle and handle.is_healthy() and handle.contexts < self.max_contexts_per_browser:
+                return handle
+
+            if handle:
+                if handle.is_healthy():
+                    self._recycles += 1
+                handle.retired = True
+                #leases still using the old browser close it when they finish
+                if handle.active == 0:
+                    await self._close_browser(handle)
+
+            self._handle = await self._launch()
+            return self._handle
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self._ensure_browser()
+            except Exception as e:
+                logger.error(f"Browser pool health check failed: {e}")
+
+    @asynccontextmanager
+    async def page(self, **context_options):
+        '''lease a fresh page in its own browser context; context_options go to browser.new_context'''
+        if not self.started:
+            await self.start()
+        if self._closing:
+            raise RuntimeError("Browser pool is shutting down")
+
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        started = time.monotonic()
+        handle = None
+        context = None
+        self._active += 1
+        self._idle.clear()
+        try:
+            handle = await self._ensure_browser()
+            handle.active += 1
+            handle.contexts += 1
+            self._leases += 1
+            context = await handle.browser.new_context(**context_options)
+            page = await context.new_page()
+            yield page
+        except Exception:
+            self._lease_errors += 1
+            raise
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    #the browser may have crashed underneath us
+                    pass
+            if handle is not None:
+                handle.active -= 1
+                if handle.retired and handle.active == 0 and handle is not self._handle:
+                    await self._close_browser(handle)
+            self._lease_seconds += time.monotonic() - started
+            self._active -= 1
+            if self._active == 0:
+                self._idle.set()
+            self._semaphore.release()
+
+    def run_sync(self, coro):
+        '''run a coroutine that leases pages from a worker thread, e.g. a sync FastAPI endpoint.
+
+        Must not be called from the pool's own event loop thread (it would block it).
+        '''
+        if self.loop is not None and self.loop.is_running():
+            return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+        #no app loop owns the pool (scripts, tests): run it for the duration of the call
+        async def standalone():
+            async with self:
+                return await coro
+        return asyncio.run(standalone())
+
+    def stats(self) -> dict:
+        handle = self._handle
+        return {
+            "started": self.started,
+            "max_pages": self.max_pages,
+            "active_pages": self._active,
+            "waiting": self._waiting,
+            "browser_generation": handle.generation if handle else None,
+            "browser_connected": handle.browser.is_connected() if handle else False,
+            "contexts_on_current_browser": handle.contexts if handle else 0,
+            "launches": self._launches,
+            "recycles": self._recycles,
+            "crashes": self._crashes,
+            "leases": self._leases,
+            "lease_errors": self._lease_errors,
+            "avg_lease_seconds": round(self._lease_seconds / self._leases, 3) if self._leases else 0.0,
+        }
+
+
+#shared instance used by scrapers.py and managed by the FastAPI app
+pool = BrowserPool()
@@ -0,0 +1,253 @@
+"""Shared TTL cache for per-ticker scraped data.
+
+Scraped pages are the same for every user, so results are cached per
+(source, ticker) and shared across requests. Each source has its own TTL,
+concurrent misses for the same key are coalesced into one fetch
+(single-flight), and hit/miss counters are exposed through stats(). Entries
+remember when they were fetched (fetched_at()), so whoever copies a cached
+result elsewhere can keep its real age.
+
+Two backends are available, picked with SCRAPE_CACHE_BACKEND:
+  memory (default)  in-process LRU bounded by SCRAPE_CACHE_MAX_BYTES
+  redis             a local Redis-compatible server at SCRAPE_CACHE_REDIS_URL;
+                    eviction is left to the server's maxmemory policy
+                    (configure it with allkeys-lru). Needs the `redis` package.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("cache")
+
+HOUR = 60 * 60
+
+#how long a scraped result stays fresh, per source
+DEFAULT_TTLS = {
+    "congress": 24 * HOUR,     #congress disclosures change daily
+    "insider": 24 * HOUR,      #openinsider filings change daily
+    "market_beat": 6 * HOUR,
+    "barchart": 15 * 60,       #barchart opinion moves intraday
+}
+
+
+def ttl_for(source: str) -> float:
+    value = os.getenv(f"CACHE_TTL_{source.upper()}")
+    return float(value) if value else DEFAULT_TTLS.get(source, HOUR)
+
+
+#how long a page that really has no data for a ticker is remembered, so it isn't re-scraped on every request
+NO_DATA_TTL = float(os.getenv("CACHE_TTL_NO_DATA", "900"))
+
+
+class NoData(dict):
+    """A scrape result for a page that loaded fine but has no data for the ticker.
+
+    Serializes like the plain dict it wraps; the cache keeps it for NO_DATA_TTL instead of not at all.
+    """
+
+
+def is_cacheable(value) -> bool:
+    '''a full result: errors and empty results aren't (see cache_ttl for real empty pages)'''
+    if not value:
+        return False
+    if isinstance(value, dict):
+        if "ERROR" in value:
+            return False
+        #{"AAPL": "No data found"} usually means a blocked or half-loaded page
+        if len(value) == 1 and list(value.values())[0] == "No data found":
+            return False
+    return True
+
+
+def cache_ttl(source: str, value) -> float:
+    '''how long to cache a scrape result: the source's TTL, NO_DATA_TTL for a real empty page, 0 for errors'''
+    if isinstance(value, NoData):
+        return NO_DATA_TTL
+    return ttl_for(source) if is_cacheable(value) else 0
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry expiry, bounded by the approximate JSON size of the values."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  #key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+
+    async def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value, ttl: float):
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    async def delete(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self.bytes -= entry[1]
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class RedisBackend:
+    """Redis-compatible backend; values are stored as JSON with a server-side expiry."""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "stockbot:scrape:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("SCRAPE_CACHE_BACKEND=redis requires the 'redis' package")
+        self.url = url
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str):
+        raw = await self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value, ttl: float):
+        await self._client.set(self.prefix + key, json.dumps(value, default=str), ex=max(1, int(ttl)))
+
+    async def delete(self, key: str):
+        await self._client.delete(self.prefix + key)
+
+    def stats(self) -> dict:
+        #host and database only: the url may carry a password
+        parts = urlsplit(self.url)
+        return {"backend": self.name, "url": f"{parts.scheme}://{parts.hostname}:{parts.port or 6379}{parts.path}"}
+
+
+class ScrapeCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self._inflight = {}  #key -> future shared by every caller waiting on that fetch
+        self._counters = {}
+
+    def _count(self, source: str, name: str):
+        counters = self._counters.setdefault(source, {"hits": 0, "misses": 0, "coalesced": 0, "stored": 0})
+        counters[name] += 1
+
+    async def _read(self, key: str) -> tuple:
+        '''(value, fetched_at) of a live entry, or (None, None)'''
+        try:
+            entry = await self.backend.get(key)
+        except Exception as e:
+            #a cache outage shouldn't take the scrapers down with it
+            logger.warning(f"Cache lookup failed for {key}: {e}")
+            return None, None
+        if isinstance(entry, dict) and set(entry) == {"fetched_at", "value"}:
+            return entry["value"], entry["fetched_at"]
+        #stored before entries carried their fetch time: age unknown
+        return entry, None
+
+    async def fetched_at(self, source: str, ticker: str):
+        '''epoch seconds the cached result for (source, ticker) was fetched, or None if there is none'''
+        value, fetched_at = await self._read(f"{source}:{ticker.upper()}")
+        if value is not None and fetched_at is None:
+            #treat an entry of unknown age as already a full TTL old
+            return time.time() - ttl_for(source)
+        return fetched_at
+
+    async def get_or_fetch(self, source: str, ticker: str, fetch):
+        '''return the cached result for (source, ticker), or await fetch() once for all concurrent callers'''
+        key = f"{source}:{ticker.upper()}"
+
+        value, _ = await self._read(key)
+        if value is not None:
+            self._count(source, "hits")
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._count(source, "coalesced")
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                #the caller that owned the fetch went away; fetch it ourselves
+
+        self._count(source, "misses")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        fetched_at = time.time()
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            #mark it retrieved so a fetch nobody else waited on doesn't log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+        ttl = cache_ttl(source, value)
+        if ttl > 0:
+            try:
+                await self.backend.set(key, {"fetched_at": fetched_at, "value": value}, ttl)
+                self._count(source, "stored")
+            except Exception as e:
+                logger.warning(f"Cache store failed for {key}: {e}")
+        return value
+
+    async def invalidate(self, source: str, ticker: str):
+        await self.backend.delete(f"{source}:{ticker.upper()}")
+
+    def stats(self) -> dict:
+        return {**self.backend.stats(), "in_flight": len(self._inflight), "sources": self._counters}
+
+
+def _make_backend():
+    kind = os.getenv("SCRAPE_CACHE_BACKEND", "memory")
+    if kind == "redis":
+        return RedisBackend(os.getenv("SCRAPE_CACHE_REDIS_URL", "redis://localhost:6379/0"))
+    return MemoryBackend(int(os.getenv("SCRAPE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
+
+
+#shared instance used by scrapers.py
+scrape_cache = ScrapeCache(_make_backend())
@@ -0,0 +1,120 @@
+"""Columnar response format for insider trades.
+
+The default /insider_trades body is one dict of strings per trade, with the
+same keys on every row and numbers left as display text ("$1,234,567").
+The columnar format sends each ticker's trades as parallel arrays instead,
+one per field, with numbers parsed once on the server and dates in ISO 8601:
+
+    {"format": "columnar",
+     "schema": {"dayFiled": "datetime", "price": "float", "quantity": "int", ...},
+     "insider_trades": [
+        {"ticker": "AAPL", "count": 2,
+         "columns": {"dayFiled": ["2024-05-24T09:15:09", ...], "price": [189.5, ...], ...}},
+        {"ticker": "MSFT", "error": "Could not fetch data ..."}]}
+
+Values that don't parse come back as null. Clients ask for it with
+?format=columnar or `Accept: application/vnd.stockbot.columnar+json`.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi import Request
+
+from workers import encode_json
+
+COLUMNAR = "columnar"
+MEDIA_TYPE = "application/vnd.stockbot.columnar+json"
+
+#insider trade field -> column type
+INSIDER_SCHEMA = {
+    "dayFiled": "datetime",
+    "dayTraded": "date",
+    "insiderName": "string",
+    "title": "string",
+    "action": "string",
+    "price": "float",
+    "quantity": "int",
+    "sharesOwned": "int",
+    "deltaOwn": "float",     #percent
+    "value": "int",          #dollars
+    "deltaDays": "int",
+}
+
+
+def wants_columnar(request: Request, format: Optional[str] = None) -> bool:
+    if format is not None:
+        return format == COLUMNAR
+    return MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _number(text):
+    '''"$1,234.50", "+1,000", "-5%", ">999%" -> the number they show, or None'''
+    if text is None or isinstance(text, (int, float)):
+        return text
+    cleaned = text.replace("$", "").replace(",", "").replace("%", "").replace(">", "").replace("+", "").strip()
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def _int(text):
+    number = _number(text)
+    return int(number) if number is not None else None
+
+
+def _datetime(text):
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt).isoformat()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _date(text):
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+CONVERTERS = {
+    "datetime": _datetime,
+    "date": _date,
+    "string": lambda value: value,
+    "float": _number,
+    "int": _int,
+}
+
+
+def columns(trades: List[Dict], schema: Dict[str, str] = INSIDER_SCHEMA) -> Dict[str, list]:
+    '''parallel typed arrays, one per schema field'''
+    return {
+        field: [CONVERTERS[kind](trade.get(field)) for trade in trades]
+        for field, kind in schema.items()
+    }
+
+
+def insider_tickers(stocks: List[str], results: List) -> List[Dict]:
+    '''per-stock /insider_trades results ({ticker: trades} or {"ERROR": ...}) in columnar form'''
+    tickers = []
+    for stock, result in zip(stocks, results):
+        trades = result.get(stock) if isinstance(result, dict) else None
+        if isinstance(result, dict) and "ERROR" in result:
+            tickers.append({"ticker": stock, "error": result["ERROR"]})
+        elif not isinstance(trades, list):
+            tickers.append({"ticker": stock, "error": "No data found"})
+        else:
+            tickers.append({"ticker": stock, "count": len(trades), "columns": columns(trades)})
+    return tickers
+
+
+def encode_insider(stocks: List[str], results: List, extra: Dict) -> bytes:
+    '''the whole columnar /insider_trades body, built and encoded in one go (runs in the worker pool)'''
+    return encode_json({
+        "format": COLUMNAR,
+        "schema": INSIDER_SCHEMA,
+        "insider_trades": insider_tickers(stocks, results),
+        **extra,
+    })
@@ -0,0 +1,43 @@
+"""Response compression.
+
+install() adds compression middleware to the app: brotli (falling back to
+gzip for clients that don't accept br) when the `brotli-asgi` package is
+installed, otherwise Starlette's gzip. Bodies under COMPRESSION_MIN_SIZE bytes
+are sent as they are. The streaming endpoints (SSE and NDJSON) are never
+compressed, so every event still goes out as soon as it is produced.
+"""
+import logging
+import os
+
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipMiddleware
+
+logger = logging.getLogger("compression")
+
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1000"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+#paths of the streaming endpoints
+STREAMING_PATHS = [r".*/stream$"]
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+
+def install(app):
+    if BrotliMiddleware is not None:
+        app.add_middleware(BrotliMiddleware, quality=BROTLI_QUALITY, minimum_size=MIN_SIZE,
+                           gzip_fallback=True, excluded_handlers=STREAMING_PATHS)
+        logger.info("Compressing responses with brotli (gzip fallback)")
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=MIN_SIZE, compresslevel=GZIP_LEVEL,
+                           exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/x-ndjson",))
+        logger.info("Compressing responses with gzip")
+
+
+def stats() -> dict:
+    return {
+        "encodings": ["br", "gzip"] if BrotliMiddleware is not None else ["gzip"],
+        "min_size": MIN_SIZE,
+    }
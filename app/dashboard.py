@@ -0,0 +1,66 @@
+"""Concurrent fan-out for the aggregated /dashboard endpoint.
+
+Every dashboard source runs at the same time with its own timeout. A source
+that misses its deadline is reported as timed out (and the payload marked
+partial) instead of holding up the others; its work keeps running in the
+background so the scrape cache is warm for the next load.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict
+
+logger = logging.getLogger("dashboard")
+
+OK = "ok"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+#seconds each source may take before the dashboard is returned without it
+DEFAULT_TIMEOUTS = {
+    "stock_analysis": 5,
+    "american_bull_info": 5,
+    "barchart_opinion_info": 20,
+    "market_beat_info": 20,
+    "congress_trades": 20,
+    "insider_trades": 20,
+}
+
+
+def timeout_for(source: str) -> float:
+    value = os.getenv(f"DASHBOARD_TIMEOUT_{source.upper()}")
+    return float(value) if value else DEFAULT_TIMEOUTS.get(source, 20)
+
+
+async def _run_source(name: str, make_coro: Callable[[], Awaitable], timeout: float):
+    started = time.perf_counter()
+    task = asyncio.ensure_future(make_coro())
+    try:
+        #shielded so a timeout only stops the waiting, not the work
+        value = await asyncio.wait_for(asyncio.shield(task), timeout)
+        status, error = OK, None
+    except asyncio.TimeoutError:
+        logger.warning(f"Dashboard source {name} timed out after {timeout}s")
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())  #don't warn about unretrieved errors
+        value, status, error = None, TIMEOUT, None
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    except Exception as e:
+        logger.error(f"Dashboard source {name} failed: {e}")
+        value, status, error = None, ERROR, str(e)
+    meta = {"status": status, "seconds": round(time.perf_counter() - started, 3)}
+    if error:
+        meta["error"] = error
+    return value, meta
+
+
+async def gather_sources(sources: Dict[str, Callable[[], Awaitable]]) -> Dict:
+    '''run every source concurrently; returns {name: value, ..., "sources": {name: meta}, "partial": bool}'''
+    names = list(sources)
+    outcomes = await asyncio.gather(*(_run_source(name, sources[name], timeout_for(name)) for name in names))
+    payload = {name: value for name, (value, _) in zip(names, outcomes)}
+    payload["sources"] = {name: meta for name, (_, meta) in zip(names, outcomes)}
+    payload["partial"] = any(meta["status"] != OK for _, meta in outcomes)
+    return payload
@@ -0,0 +1,46 @@
+"""Chunked Firestore batch writes.
+
+Writes are collected as ("set" | "merge" | "delete", document_ref, data) tuples and
+committed through db.batch() in chunks that stay under Firestore's per-batch
+write limit. Each chunk commits atomically, so a failed chunk is retried as a
+whole (with exponential backoff) without re-sending chunks that already
+landed. Chunks that still fail are returned to the caller.
+"""
+import logging
+import time
+from typing import List, Tuple
+
+logger = logging.getLogger("firestore_writes")
+
+#Firestore rejects batches with more than 500 writes
+MAX_BATCH_WRITES = 500
+
+
+def commit_writes(db, writes: List[Tuple], chunk_size: int = MAX_BATCH_WRITES,
+                  retries: int = 3, backoff: float = 0.5) -> List[Tuple]:
+    """Commit writes in batches; returns the writes that could not be committed."""
+    failed = []
+    for start in range(0, len(writes), chunk_size):
+        chunk = writes[start:start + chunk_size]
+        for attempt in range(retries + 1):
+            batch = db.batch()
+            for op, ref, data in chunk:
+                if op == "set":
+                    batch.set(ref, data)
+                elif op == "merge":
+                    batch.set(ref, data, merge=True)
+                elif op == "delete":
+                    batch.delete(ref)
+                else:
+                    raise ValueError(f"Unknown write type: {op}")
+            try:
+                batch.commit()
+                break
+            except Exception as e:
+                if attempt == retries:
+                    logger.error(f"Giving up on a batch of {len(chunk)} write(s) after {retries + 1} attempts: {e}")
+                    failed.extend(chunk)
+                else:
+                    logger.warning(f"Batch of {len(chunk)} write(s) failed (attempt {attempt + 1}), retrying: {e}")
+                    time.sleep(backoff * 2 ** attempt)
+    return failed
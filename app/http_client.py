@@ -0,0 +1,114 @@
+"""Shared async HTTP client for sources that don't need a browser.
+
+One httpx.AsyncClient is kept for the lifetime of the app (started and
+closed in main's lifespan), so requests reuse pooled keep-alive connections
+and get gzip/deflate (and brotli, if the `brotli` package is installed)
+responses. get() adds a per-request timeout and retries transport errors and
+retryable status codes with exponential backoff.
+"""
+import asyncio
+import logging
+import os
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger("http_client")
+
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+
+class HttpClient:
+    def __init__(self, max_connections: int = MAX_CONNECTIONS, max_keepalive: int = MAX_KEEPALIVE,
+                 timeout: float = TIMEOUT, retries: int = RETRIES):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.timeout = timeout
+        self.retries = retries
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.retried = 0
+        self.errors = 0
+        self.bytes_downloaded = 0
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_keepalive),
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers={"Accept-Encoding": ACCEPT_ENCODING},
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        '''the shared client, created on first use for the running loop'''
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            #connections belong to one event loop; standalone scripts get their own client
+            self._client = self._new_client()
+            self._loop = loop
+        return self._client
+
+    async def start(self):
+        self.client
+
+    async def stop(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def get(self, url: str, retries: Optional[int] = None, **kwargs) -> httpx.Response:
+        '''GET with retries; raises for non-2xx responses once retries are used up'''
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            self.requests += 1
+            try:
+                response = await self.client.get(url, **kwargs)
+                self.bytes_downloaded += response.num_bytes_downloaded
+                if response.status_code in RETRY_STATUSES and attempt < retries:
+                    raise httpx.HTTPStatusError(f"{response.status_code} from {url}",
+                                                request=response.request, response=response)
+                response.raise_for_status()
+                return response
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRY_STATUSES
+                if not retryable or attempt == retries:
+                    self.errors += 1
+                    raise
+                self.retried += 1
+                logger.warning(f"GET {url} failed (attempt {attempt + 1}), retrying: {e}")
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "errors": self.errors,
+            "bytes_downloaded": self.bytes_downloaded,
+            "accept_encoding": ACCEPT_ENCODING,
+        }
+
+
+#shared instance
+http = HttpClient()
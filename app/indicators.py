@@ -0,0 +1,207 @@
+"""Stochastic oscillator and zone classification.
+
+``stochastic_panel`` computes %K/%D and the zone/action classification for a
+whole watchlist at once from a wide (date x ticker) panel, with NumPy ops that
+run across all tickers per step instead of a Python loop per ticker. Its
+results are bit-identical to the per-ticker pandas version
+(``latest_stochastic``): rolling max/min are exact, and the %D rolling mean
+replays pandas' compensated running-sum kernel rather than recomputing each
+window from scratch, since the two differ in the last ulp.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+UNKNOWN = "Unknown"
+OVERBOUGHT = "Red Zone: Overbought - Potential Sell Opportunity"
+NEUTRAL = "Neutral Zone: Hold Phase"
+OVERSOLD = "Green Zone: Oversold - Potential Buy Opportunity"
+
+#code -> label for the columnar result
+ZONES = (UNKNOWN, OVERBOUGHT, NEUTRAL, OVERSOLD)
+ACTIONS = ("Hold", "Consider Selling", "Consider Buying")
+
+
+def determine_zone(latest_k: float, latest_d: float) -> str:
+    """Determine the zone based on %K and %D values."""
+    if latest_k is None or latest_d is None:
+        return UNKNOWN
+    elif latest_k > 80 or latest_d > 80:
+        return OVERBOUGHT
+    elif 20 <= latest_k <= 80 or 20 <= latest_d <= 80:
+        return NEUTRAL
+    elif latest_k < 20 or latest_d < 20:
+        return OVERSOLD
+    else:
+        return NEUTRAL
+
+
+def decide_action(zone: str) -> str:
+    """Decide action based on the zone."""
+    if "Overbought" in zone:
+        return "Consider Selling"
+    elif "Oversold" in zone:
+        return "Consider Buying"
+    else:
+        return "Hold"
+
+
+def latest_stochastic(data: pd.DataFrame, period: int = 14, smooth_k: int = 1, smooth_d: int = 3):
+    """Per-ticker reference: latest %K and %D from one ticker's OHLC frame."""
+    high_max = data['High'].rolling(window=period).max()
+    low_min = data['Low'].rolling(window=period).min()
+    k = 100 * ((data['Close'] - low_min) / (high_max - low_min))
+    if smooth_k > 1:
+        k = k.rolling(window=smooth_k).mean()
+    d = k.rolling(window=smooth_d).mean()
+    return k.iloc[-1], d.iloc[-1]
+
+
+def window_bars(period: int = 14, smooth_k: int = 1, smooth_d: int = 3) -> int:
+    """Fewest trailing bars that determine the latest %K and %D."""
+    return period + (smooth_k - 1) + (smooth_d - 1)
+
+
+def _rolling_extreme(values: np.ndarray, window: int, func) -> np.ndarray:
+    '''rolling max/min down axis 0 for every column; NaN until a full window of values'''
+    out = np.full(values.shape, np.nan)
+    if values.shape[0] >= window:
+        with np.errstate(invalid="ignore"):
+            out[window - 1:] = func(sliding_window_view(values, window, axis=0), axis=-1)
+    return out
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    '''rolling mean down axis 0, replaying pandas' roll_mean kernel across all columns at once'''
+    rows, cols = values.shape
+    out = np.full(values.shape, np.nan)
+    sum_x = np.zeros(cols)
+    comp_add = np.zeros(cols)
+    comp_remove = np.zeros(cols)
+    nobs = np.zeros(cols, dtype=np.int64)
+    neg_ct = np.zeros(cols, dtype=np.int64)
+    same_ct = np.zeros(cols, dtype=np.int64)
+    prev = values[0].copy() if rows else np.zeros(cols)
+
+    for i in range(rows):
+        if i >= window:
+            old = values[i - window]
+            valid = old == old
+            y = -old - comp_remove
+            t = sum_x + y
+            comp_remove = np.where(valid, t - sum_x - y, comp_remove)
+            sum_x = np.where(valid, t, sum_x)
+            nobs -= valid
+            neg_ct -= valid & np.signbit(old)
+
+        new = values[i]
+        valid = new == new
+        y = new - comp_add
+        t = sum_x + y
+        comp_add = np.where(valid, t - sum_x - y, comp_add)
+        sum_x = np.where(valid, t, sum_x)
+        nobs += valid
+        neg_ct += valid & np.signbit(new)
+        same_ct = np.where(valid, np.where(new == prev, same_ct + 1, 1), same_ct)
+        prev = np.where(valid, new, prev)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = sum_x / nobs
+        result = np.where(same_ct >= nobs, prev, result)
+        result = np.where((neg_ct == 0) & (result < 0), 0.0, result)
+        result = np.where((neg_ct == nobs) & (result > 0), 0.0, result)
+        out[i] = np.where((nobs >= window) & (nobs > 0), result, np.nan)
+    return out
+
+
+def _right_align(present: np.ndarray, *arrays: np.ndarray):
+    '''push each column's bars to the bottom so tickers with gaps in the shared date index
+    see only their own rows, the same as a per-ticker frame would'''
+    order = np.argsort(present, axis=0, kind="stable")
+    return [np.take_along_axis(a, order, axis=0) for a in arrays]
+
+
+def stochastic_panel(high: pd.DataFrame, low: pd.DataFrame, close: pd.DataFrame,
+                     period: int = 14, smooth_k: int = 1, smooth_d: int = 3) -> Dict[str, np.ndarray]:
+    """Latest %K/%D, zone and action for every ticker in a wide (date x ticker) panel.
+
+    Returns columns as arrays: "ticker", "%K", "%D", plus "zone" and "action" as
+    small integer codes into ZONES and ACTIONS. Tickers with no bars at all are
+    classified "Unknown", like determine_zone(None, None).
+    """
+    tickers = np.asarray(close.columns)
+    h = high[close.columns].to_numpy(dtype=np.float64)
+    l = low[close.columns].to_numpy(dtype=np.float64)
+    c = close.to_numpy(dtype=np.float64)
+
+    present = ~(np.isnan(h) & np.isnan(l) & np.isnan(c))
+    h, l, c = _right_align(present, h, l, c)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        low_min = _rolling_extreme(l, period, np.min)
+        k = 100 * ((c - low_min) / (_rolling_extreme(h, period, np.max) - low_min))
+    if smooth_k > 1:
+        k = _rolling_mean(k, smooth_k)
+    d = _rolling_mean(k, smooth_d)
+
+    if len(c):
+        latest_k, latest_d = k[-1], d[-1]
+    else:
+        latest_k = latest_d = np.full(len(tickers), np.nan)
+
+    #same precedence as determine_zone; NaN compares False everywhere, just like in Python
+    with np.errstate(invalid="ignore"):
+        zone = np.select(
+            [latest_k > 80, latest_d > 80,
+             (latest_k >= 20) & (latest_k <= 80), (latest_d >= 20) & (latest_d <= 80),
+             latest_k < 20, latest_d < 20],
+            [1, 1, 2, 2, 3, 3],
+            default=2,
+        ).astype(np.uint8)
+    zone[~present.any(axis=0)] = 0
+    action = np.select([zone == 1, zone == 3], [1, 2], default=0).astype(np.uint8)
+
+    return {"ticker": tickers, "%K": latest_k, "%D": latest_d, "zone": zone, "action": action}
+
+
+def panel_from_frames(frames: Dict[str, pd.DataFrame]):
+    """Wide High/Low/Close panels from per-ticker OHLC frames (as returned by market_data.download_ohlc)."""
+    frames = {symbol: frame for symbol, frame in frames.items() if frame is not None and not frame.empty}
+    if not frames:
+        empty = pd.DataFrame()
+        return empty, empty, empty
+
+    index = frames[next(iter(frames))].index
+    for frame in frames.values():
+        if not frame.index.equals(index):
+            index = index.union(frame.index)
+
+    #fill preallocated arrays rather than aligning a Series per ticker and field
+    panels = np.full((3, len(index), len(frames)), np.nan)
+    for col, frame in enumerate(frames.values()):
+        rows = slice(None) if frame.index.equals(index) else index.get_indexer(frame.index)
+        for field, name in enumerate(("High", "Low", "Close")):
+            panels[field, rows, col] = frame[name].to_numpy(dtype=np.float64)
+    columns = pd.Index(list(frames))
+    return tuple(pd.DataFrame(panel, index=index, columns=columns) for panel in panels)
+
+
+def watchlist_records(frames: Dict[str, pd.DataFrame]) -> Dict[str, dict]:
+    """records() for per-ticker OHLC frames in one call, so the whole computation can run in a worker process."""
+    return records(stochastic_panel(*panel_from_frames(frames)))
+
+
+def records(result: Dict[str, np.ndarray]) -> Dict[str, dict]:
+    """Expand a stochastic_panel result to {ticker: {"%K", "%D", "Zone", "Decision"}}."""
+    return {
+        ticker: {
+            "%K": float(k),
+            "%D": float(d),
+            "Zone": ZONES[zone],
+            "Decision": ACTIONS[action],
+        }
+        for ticker, k, d, zone, action in zip(result["ticker"], result["%K"], result["%D"],
+                                              result["zone"], result["action"])
+    }
@@ -0,0 +1,149 @@
+"""Robinhood instrument URL -> ticker symbol lookups.
+
+Orders only reference their instrument by URL, so listing trades means one
+instrument lookup per order. An instrument's symbol never changes, so every
+instrument fetched is kept in a persistent index (a SQLite file shared by all
+users) with its id, symbol and the rest of its metadata. resolve() answers
+from memory, then from the index in one bulk query, and only fetches the
+distinct URLs it has never seen, all at once (within the robinhood host limits
+in throttle.py). A login's trade listing costs O(distinct new instruments)
+requests, and nothing on warm data.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import throttle
+from http_client import http
+
+logger = logging.getLogger("instruments")
+
+INDEX_PATH = os.getenv("INSTRUMENT_INDEX_PATH", "instruments.sqlite3")
+#SQLite's default limit on bound parameters per statement
+MAX_QUERY_PARAMS = 900
+
+
+class InstrumentIndex:
+    """Persistent instrument URL -> (id, symbol, metadata) table."""
+
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS instruments (
+                url TEXT PRIMARY KEY,
+                id TEXT,
+                symbol TEXT NOT NULL,
+                metadata TEXT,
+                fetched_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS instruments_id ON instruments (id)")
+        self._conn.commit()
+
+    def symbols(self, urls: List[str]) -> Dict[str, str]:
+        '''bulk lookup; URLs not in the index are left out'''
+        found = {}
+        with self._lock:
+            for start in range(0, len(urls), MAX_QUERY_PARAMS):
+                chunk = urls[start:start + MAX_QUERY_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self._conn.execute(
+                    f"SELECT url, symbol FROM instruments WHERE url IN ({placeholders})", chunk
+                ).fetchall())
+        return found
+
+    def metadata(self, url: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT metadata FROM instruments WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def add(self, url: str, instrument: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO instruments VALUES (?, ?, ?, ?, ?)",
+                (url, instrument.get("id"), instrument["symbol"], json.dumps(instrument), time.time()),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM instruments").fetchone()[0]
+
+
+class InstrumentResolver:
+    def __init__(self, index: InstrumentIndex):
+        self.index = index
+        self._symbols: Dict[str, str] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.index_hits = 0
+        self.fetched = 0
+        self.errors = 0
+
+    async def _fetch(self, url: str) -> Optional[str]:
+        async with throttle.host_limiter("robinhood"):
+            response = await http.get(url)
+        self.fetched += 1
+        instrument = response.json()
+        if instrument.get("symbol"):
+            await asyncio.to_thread(self.index.add, url, instrument)
+        return instrument.get("symbol")
+
+    async def symbol(self, url: str) -> Optional[str]:
+        '''the ticker for one instrument URL, or None if it couldn't be looked up'''
+        return (await self.resolve([url]))[url]
+
+    async def _lookup(self, url: str) -> Optional[str]:
+        task = self._inflight.get(url)
+        if task is None:
+            task = self._inflight[url] = asyncio.ensure_future(self._fetch(url))
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        try:
+            symbol = await asyncio.shield(task)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Instrument lookup failed for {url}: {e}")
+            return None
+        if symbol:
+            self._symbols[url] = symbol
+        return symbol
+
+    async def resolve(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        '''symbols for many instrument URLs: memory, then one bulk index query, then concurrent fetches'''
+        urls = list(dict.fromkeys(urls))
+        symbols = {url: self._symbols[url] for url in urls if url in self._symbols}
+        self.hits += len(symbols)
+
+        unknown = [url for url in urls if url not in symbols]
+        if unknown:
+            indexed = await asyncio.to_thread(self.index.symbols, unknown)
+            self.index_hits += len(indexed)
+            self._symbols.update(indexed)
+            symbols.update(indexed)
+
+        missing = [url for url in unknown if url not in symbols]
+        fetched = await asyncio.gather(*(self._lookup(url) for url in missing))
+        symbols.update(zip(missing, fetched))
+        return {url: symbols.get(url) for url in urls}
+
+    def stats(self) -> dict:
+        return {
+            "indexed": len(self.index),
+            "in_memory": len(self._symbols),
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "index_hits": self.index_hits,
+            "fetched": self.fetched,
+            "errors": self.errors,
+        }
+
+
+#shared instance used by the Robinhood endpoints
+instruments = InstrumentResolver(InstrumentIndex())
@@ -0,0 +1,175 @@
+"""In-process background job queue.
+
+Endpoints submit work and return a job id straight away; a fixed pool of
+worker tasks on the app's event loop runs the jobs (sync job functions run in
+a thread so they don't block the loop). Jobs report per-item progress and
+partial results that clients can poll. Only one queued/running job is kept per
+key, so submitting again for the same user returns the job already in flight.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+logger = logging.getLogger("jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    def __init__(self, key: str, total: int = 0):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.total = total
+        self.results = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    def add_result(self, item: dict):
+        '''record one finished item; visible to pollers immediately'''
+        self.results.append(item)
+
+    async def follow(self, poll_interval: float = 0.25):
+        '''yield each result as it is recorded, returning once the job has finished'''
+        sent = 0
+        while True:
+            finished = not self.active
+            while sent < len(self.results):
+                yield self.results[sent]
+                sent += 1
+            if finished:
+                return
+            await asyncio.sleep(poll_interval)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "completed": len(self.results),
+            "results": list(self.results),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    def __init__(self, name: str, workers: int = 4, keep_seconds: float = 3600):
+        self.name = name
+        self.workers = workers
+        self.keep_seconds = keep_seconds
+        self._jobs = {}
+        self._active_by_key = {}
+        self._lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks = []
+        self.deduplicated = 0
+        self.completed = 0
+        self.failed = 0
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Job queue '{self.name}' started with {self.workers} worker(s)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    def submit(self, key: str, func: Callable, *args, total: int = 0):
+        '''queue func(job, *args) unless `key` already has an active job; returns (job, created).
+
+        Safe to call from the event loop or from a threadpool worker (sync endpoints).
+        '''
+        if self._loop is None:
+            raise RuntimeError(f"Job queue '{self.name}' is not running")
+        with self._lock:
+            self._prune()
+            existing = self._active_by_key.get(key)
+            if existing is not None and existing.active:
+                self.deduplicated += 1
+                return existing, False
+            job = Job(key, total=total)
+            self._jobs[job.id] = job
+            self._active_by_key[key] = job
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (job, func, args))
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def latest(self, key: str) -> Optional[Job]:
+        '''most recent job for a key, active or finished'''
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.key == key]
+        return max(jobs, key=lambda job: job.created_at) if jobs else None
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if not job.active and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job, func, args = await self._queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            try:
+                if asyncio.iscoroutinefunction(func):
+                    job.result = await func(job, *args)
+                else:
+                    job.result = await asyncio.to_thread(func, job, *args)
+                job.status = DONE
+                self.completed += 1
+            except asyncio.CancelledError:
+                job.status = FAILED
+                job.error = "Cancelled on shutdown"
+                raise
+            except Exception as e:
+                logger.error(f"Job {job.id} ({self.name}) failed: {e}")
+                job.status = FAILED
+                job.error = str(e)
+                self.failed += 1
+            finally:
+                job.finished_at = time.time()
+                with self._lock:
+                    if self._active_by_key.get(job.key) is job:
+                        del self._active_by_key[job.key]
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        jobs = list(self._jobs.values())
+        return {
+            "workers": self.workers,
+            "queued": sum(job.status == QUEUED for job in jobs),
+            "running": sum(job.status == RUNNING for job in jobs),
+            "completed": self.completed,
+            "failed": self.failed,
+            "deduplicated": self.deduplicated,
+        }
+
+
+#queue for /execute_analysis
+analysis_jobs = JobQueue("analysis", workers=int(os.getenv("ANALYSIS_WORKERS", "4")))
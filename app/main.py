@@ -1,22 +1,40 @@
 # main.py
 import os
-from fastapi import FastAPI, HTTPException, Query, Depends, Header, Request
+import asyncio
+from fastapi import FastAPI, HTTPException, Query, Depends, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 import yfinance as yf
 from datetime import datetime
 from typing import Optional, List, Dict
 import logging
 import firebase_admin
-from firebase_admin import credentials, auth as firebase_auth, firestore
-import requests
-from bs4 import BeautifulSoup
+from firebase_admin import credentials, firestore
 from pydantic import BaseModel
 import time
 import pyotp
-from fastapi.background import BackgroundTasks
-from playwright.sync_api import sync_playwright #lightweight library for rendering webpages
-from dateutil import parser
+import robin_stocks.robinhood as r
+from contextlib import asynccontextmanager
 import scrapers
+import ohlc_store
+import order_store
+import trade_store
+import throttle
+import page_loads
+from http_client import http as http_client
+from instruments import instruments
+from cache import scrape_cache, ttl_for
+from browser_pool import pool as browser_pool
+from jobs import Job, analysis_jobs
+from firestore_writes import commit_writes
+from user_cache import UserDocCache
+from token_cache import verified_tokens
+import workers
+from workers import cpu_workers
+import dashboard
+import streaming
+import columnar
+import compression
+import precompute
 
 
 class Credentials(BaseModel):
@@ -24,9 +42,6 @@ class Credentials(BaseModel):
     password: str
     totp_secret: str 
 
-class UsernameModel(BaseModel):
-    username: str
-
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("main")
@@ -41,9 +56,41 @@ cred = credentials.Certificate(service_account_path)
 firebase_admin.initialize_app(cred)
 db = firestore.client()
 
+# users/{email} documents, shared by get_current_user and the endpoints
+user_docs = UserDocCache(db)
+
+# Market-wide refresh of every watched ticker into tickers/{symbol}
+precomputer = precompute.Precomputer(db)
+
+# Emails allowed to read /stats (comma-separated); unset means nobody
+STATS_ADMINS = {email.strip().lower() for email in os.getenv("STATS_ADMINS", "").split(",") if email.strip()}
+
 
 # --- FastAPI App ---
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One browser for the lifetime of the app, shared by all scrapers
+    await browser_pool.start()
+    # Pooled keep-alive connections for sources fetched without a browser
+    await http_client.start()
+    # Worker processes for parsing, indicators and columnar bodies, warmed up before the first request
+    await cpu_workers.start()
+    await analysis_jobs.start()
+    if precompute.IN_PROCESS:
+        await precomputer.start()
+    try:
+        yield
+    finally:
+        await precomputer.stop()
+        await analysis_jobs.stop()
+        await cpu_workers.stop()
+        await http_client.stop()
+        await browser_pool.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+# robin_stocks keeps one global login session, so logins and the reads that follow them run one at a time
+robinhood_session = asyncio.Lock()
 
 # CORS for local dev and production
 app.add_middleware(
@@ -56,46 +103,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip (or brotli) for the larger JSON bodies
+compression.install(app)
+
 @app.post("/validate_and_fetch_trades")
-async def validate_and_fetch_trades(creds: Credentials):
+async def validate_and_fetch_trades(creds: Credentials, full_resync: bool = Query(False)):
     """
     Validate Robinhood credentials and fetch trades. If valid, store credentials in Firestore.
+    Orders are synced incrementally into the local order store; pass full_resync=true to re-download all of them.
     """
     try:
         totp_code = pyotp.TOTP(creds.totp_secret).now()
-        response = r.login(creds.username, creds.password, mfa_code=totp_code, store_session=False)
-        if not response.get("access_token"):
-            return {"isValid": False, "error": "Invalid credentials. Please try again."}
+        # robin_stocks is blocking, so it runs in a thread instead of on the event loop
+        async with robinhood_session:
+            response = await asyncio.to_thread(
+                r.login, creds.username, creds.password, mfa_code=totp_code, store_session=False)
+            if not response.get("access_token"):
+                return {"isValid": False, "error": "Invalid credentials. Please try again."}
+            account_profile = await asyncio.to_thread(r.profiles.load_account_profile)
+            # Only orders updated since the last sync are downloaded
+            await asyncio.to_thread(order_store.store.sync, creds.username, r.orders.get_all_stock_orders, full_resync)
 
         # Save credentials
         users_ref = db.collection("users").document(creds.username)
-        users_ref.set({
+        saved = {
             "username": creds.username,
             "password": creds.password,
             "totp_secret": creds.totp_secret,
             "last_login": datetime.utcnow().isoformat(),
-        }, merge=True)
+        }
+        await asyncio.to_thread(users_ref.set, saved, merge=True)
+        user_docs.update(creds.username, saved)
 
         # Fetch trades
-        account_profile = r.profiles.load_account_profile()
         portfolio_cash = float(account_profile.get("portfolio_cash", 0))
         buying_power = float(account_profile.get("buying_power", 0))
         cash_available = float(account_profile.get("cash", 0))
 
-        orders = r.orders.get_all_stock_orders()
+        # Already sorted newest first by the store
+        filled = await asyncio.to_thread(order_store.store.filled, creds.username)
+        # Instrument -> symbol lookups are memoized and the unknown ones fetched concurrently
+        symbols = await instruments.resolve(order["instrument"] for order in filled)
         trades = []
-        for order in orders:
-            if order.get("state") == "filled":
-                instr = requests.get(order["instrument"]).json()
-                trades.append({
-                    "symbol": instr.get("symbol"),
-                    "side": order["side"],
-                    "quantity": float(order.get("quantity", 0)),
-                    "price": float(order.get("average_price", 0)),
-                    "date": order.get("last_transaction_at"),
-                })
-
-        trades = sorted(trades, key=lambda x: x["date"], reverse=True)
+        for order in filled:
+            trades.append({
+                "symbol": symbols.get(order["instrument"]),
+                "side": order["side"],
+                "quantity": float(order.get("quantity", 0)),
+                "price": float(order.get("average_price", 0)),
+                "date": order.get("last_transaction_at"),
+            })
 
         # Recommendations (placeholder)
         recommended_trades = [
@@ -129,7 +186,7 @@ async def log_requests(request: Request, call_next):
     return response
 
 # --- Helpers ---
-def get_current_user(authorization: Optional[str] = Header(None)) -> str:
+def get_current_user(request: Request, authorization: Optional[str] = Header(None)) -> str:
     if not authorization:
         logger.error("No Authorization header provided.")
         raise HTTPException(status_code=401, detail="No authorization header provided.")
@@ -141,40 +198,53 @@ def get_current_user(authorization: Optional[str] = Header(None)) -> str:
 
     id_token = token_parts[1]
     try:
-        decoded_token = firebase_auth.verify_id_token(id_token)
+        # Verified once per token, then served from the cache until it expires
+        decoded_token = verified_tokens.verify(id_token)
         email = decoded_token.get("email")
         logger.info(f"Token verified. User email: {email}")
         if not email:
             raise HTTPException(status_code=401, detail="Invalid token: email not found.")
 
-        # Ensure Firestore user document exists
-        user_ref = db.collection("users").document(email)
-        if not user_ref.get().exists:
-            user_ref.set({
-                "stocks": [],
-                "stock_analysis": {},
-                "american_bull_info": {}
-            })
+        # Ensure Firestore user document exists (checked once per user per process)
+        if verified_tokens.is_known_user(email):
+            return email
+        if user_docs.for_request(request, email) is None:
+            # Analysis lives in the shared tickers/{symbol} documents; users only keep their list
+            new_doc = {
+                "stocks": []
+            }
+            db.collection("users").document(email).set(new_doc)
+            user_docs.set(email, new_doc)
+            request.state.user_doc = new_doc
             logger.info(f"Created new user document for {email}")
+        verified_tokens.mark_known_user(email)
 
         return email
     except Exception as e:
         logger.error(f"Error verifying Firebase token: {e}")
         raise HTTPException(status_code=401, detail="Invalid or expired token.")
 
+def current_user_doc(request: Request, user_email: str) -> Dict:
+    """The caller's user document, read at most once per request (see user_cache)."""
+    return user_docs.for_request(request, user_email) or {}
+
+def fresh_stocks(user_email: str) -> List[str]:
+    """The user's watchlist as stored now, bypassing the (up to USER_DOC_TTL old) cached document."""
+    user_docs.invalidate(user_email)
+    return (user_docs.get(user_email) or {}).get("stocks", [])
+
 @app.get("/get_credentials")
-def get_credentials(username: str = Query(...), user_email: str = Depends(get_current_user)):
+def get_credentials(request: Request, username: str = Query(...), user_email: str = Depends(get_current_user)):
     """
     Retrieve stored credentials for the given username, only if it matches the logged-in user's email.
     """
     if username.strip().lower() != user_email.strip().lower():
         raise HTTPException(status_code=403, detail="The entered username does not match the logged-in user's email.")
 
-    doc_ref = db.collection("users").document(username).get()
-    if not doc_ref.exists:
+    data = user_docs.for_request(request, user_email)
+    if data is None:
         return {"error": "No credentials found for this user."}
 
-    data = doc_ref.to_dict()
     if "username" not in data or "password" not in data or "totp_secret" not in data:
         return {"error": "Incomplete credentials stored."}
 
@@ -189,143 +259,13 @@ def get_credentials(username: str = Query(...), user_email: str = Depends(get_cu
 def get_current_user_endpoint(current_user: str = Depends(get_current_user)):
     return {"email": current_user}
 
-def recommend_data() -> List[Dict]:
-    """Scrape recommended stock data from American Bulls website."""
-    url = "https://www.americanbulls.com/Default.aspx?lang=en"
-
-    try:
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, "lxml")
-
-        # Find the table that contains the stock data
-        table = soup.find("table", class_="table-hover")
-        if not table:
-            logger.error("No table found on the American Bulls page.")
-            return []
-
-        # Extract all rows (tr elements) with class "gridRows"
-        rows = table.find_all("tr", class_="gridRows")
-        stock_data = []
-
-        # Helper function to clean text
-        def clean_text(text):
-            return ' '.join(text.split()).replace("\n", "").replace("\r", "").strip()
-
-        for row in rows:
-            date_div = row.find("div", id=lambda x: x and "Tarih" in x)
-            stock_a = row.find("a", class_="dxbs-hyperlink")
-            signal_div = row.find("div", id=lambda x: x and "gridlevel" in x)
-            buy_level_div = row.find("div", id=lambda x: x and "gridprice" in x)
-            close_price_div = row.find("div", id=lambda x: x and "gridclose" in x)
-
-            date = clean_text(date_div.text) if date_div else "N/A"
-            stock_name = clean_text(stock_a.text) if stock_a else "N/A"
-            signal = clean_text(signal_div.text) if signal_div else "N/A"
-            buy_level = clean_text(buy_level_div.text) if buy_level_div else "N/A"
-            close_price = clean_text(close_price_div.text) if close_price_div else "N/A"
-
-            stock_data.append({
-                "Date": date,
-                "Stock Name": stock_name,
-                "Signal": signal,
-                "Buy Level": buy_level,
-                "Close Price": close_price,
-            })
-
-        return stock_data
-
-    except Exception as e:
-        logger.error(f"Error scraping American Bulls data: {e}")
-        return []
-
-def specific_stock(stock_code: str) -> List[Dict]:
-    """Scrape specific stock data from American Bulls website."""
-    url = f"https://www.americanbulls.com/SignalPage.aspx?lang=en&Ticker={stock_code}"
-
-    try:
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, "lxml")
-
-        # Find the table by its id
-        table = soup.find("table", id="Content_SignalHistory_SignalShortHistoryGrid_DXMainTable")
-        if not table:
-            logger.error(f"Table not found for stock: {stock_code}")
-            return []
-
-        table_data = []
-        # Loop through each row in the table body (tr elements)
-        for row in table.find("tbody").find_all("tr"):
-            cells = row.find_all("td")
-            if len(cells) >= 5:
-                date = cells[0].text.strip()
-                price = cells[1].text.strip()
-                signal = cells[2].text.strip()
-                change = cells[3].text.strip()
-                value = cells[4].text.strip()
-
-                table_data.append({
-                    "Date": date,
-                    "Price": price,
-                    "Signal": signal,
-                    "Change%": change,
-                    "Value": value,
-                })
-
-        return table_data
-
-    except Exception as e:
-        logger.error(f"Error scraping specific stock data for {stock_code}: {e}")
-        return []
-
-def calculate_stochastic(stock_symbol: str, period: int = 14):
-    """Calculate the stochastic oscillator for a given stock."""
-    try:
-        data = yf.download(stock_symbol, period='1mo', interval='1d')
-        if data.empty:
-            logger.error(f"No data found for stock: {stock_symbol}")
-            return None, None
-
-        high_max = data['High'].rolling(window=period).max()
-        low_min = data['Low'].rolling(window=period).min()
-        data['%K'] = 100 * ((data['Close'] - low_min) / (high_max - low_min))
-        data['%D'] = data['%K'].rolling(window=3).mean()
-
-        latest_k = data['%K'].iloc[-1]
-        latest_d = data['%D'].iloc[-1]
-        return latest_k, latest_d
-    except Exception as e:
-        logger.error(f"Error calculating stochastic for {stock_symbol}: {e}")
-        return None, None
-
-def determine_zone(latest_k: float, latest_d: float) -> str:
-    """Determine the zone based on %K and %D values."""
-    if latest_k is None or latest_d is None:
-        return "Unknown"
-    elif latest_k > 80 or latest_d > 80:
-        return "Red Zone: Overbought - Potential Sell Opportunity"
-    elif 20 <= latest_k <= 80 or 20 <= latest_d <= 80:
-        return "Neutral Zone: Hold Phase"
-    elif latest_k < 20 or latest_d < 20:
-        return "Green Zone: Oversold - Potential Buy Opportunity"
-    else:
-        return "Neutral Zone: Hold Phase"
-
-def decide_action(zone: str) -> str:
-    """Decide action based on the zone."""
-    if "Overbought" in zone:
-        return "Consider Selling"
-    elif "Oversold" in zone:
-        return "Consider Buying"
-    else:
-        return "Hold"
-
 # --- Endpoints ---
 @app.options("/{full_path:path}")
 async def preflight(full_path: str):
     return {"message": "Preflight request"}
 
 @app.post("/add_stock")
-def add_stock(stock_symbol: str = Query(None), user_email: str = Depends(get_current_user)):
+def add_stock(request: Request, stock_symbol: str = Query(None), user_email: str = Depends(get_current_user)):
     if not stock_symbol:
         raise HTTPException(status_code=400, detail="Stock symbol is required.")
     stock_symbol = stock_symbol.upper()
@@ -339,208 +279,308 @@ def add_stock(stock_symbol: str = Query(None), user_email: str = Depends(get_cur
         raise HTTPException(status_code=400, detail=f"Invalid stock symbol: {stock_symbol}")
 
     user_ref = db.collection("users").document(user_email)
-    user_data = user_ref.get().to_dict()
-    stocks = user_data.get("stocks", [])
-    if stock_symbol in stocks:
+    if stock_symbol in fresh_stocks(user_email):
         return {"message": f"Stock {stock_symbol} is already in your list."}
-    stocks.append(stock_symbol)
-    user_ref.update({"stocks": stocks})
+    # ArrayUnion adds to whatever the list holds now, so a concurrent add or remove isn't lost
+    user_ref.update({"stocks": firestore.ArrayUnion([stock_symbol])})
+    user_docs.invalidate(user_email)
     return {"message": f"Stock {stock_symbol} added to your list."}
 
 @app.post("/remove_stock")
-def remove_stock(stock_symbol: str = Query(...), user_email: str = Depends(get_current_user)):
+def remove_stock(request: Request, stock_symbol: str = Query(...), user_email: str = Depends(get_current_user)):
     stock_symbol = stock_symbol.upper()
     user_ref = db.collection("users").document(user_email)
-    user_data = user_ref.get().to_dict()
-    stocks = user_data.get("stocks", [])
-    if stock_symbol not in stocks:
+    if stock_symbol not in fresh_stocks(user_email):
         return {"message": f"Stock {stock_symbol} is not in your list."}
-    stocks = [s for s in stocks if s != stock_symbol]
-    user_ref.update({"stocks": stocks})
-
-    # Remove analysis data
-    stock_analysis_ref = user_ref.collection("stock_analysis").document(stock_symbol)
-    stock_analysis_ref.delete()
-
-    american_bull_ref = user_ref.collection("american_bull_info").document(stock_symbol)
-    american_bull_ref.delete()
-
+    user_ref.update({"stocks": firestore.ArrayRemove([stock_symbol])})
+    user_docs.invalidate(user_email)
+    # Analysis data is shared per ticker in tickers/{symbol}; only documents left from the old per-user layout go
+    commit_writes(db, precompute.legacy_deletes(user_ref, [stock_symbol]))
     return {"message": f"Stock {stock_symbol} removed from your list."}
 
 @app.get("/stocks")
-def get_stocks(user_email: str = Depends(get_current_user)):
-    user_ref = db.collection("users").document(user_email)
-    user_data = user_ref.get().to_dict()
+def get_stocks(request: Request, user_email: str = Depends(get_current_user)):
+    user_data = current_user_doc(request, user_email)
     return {"stocks": user_data.get("stocks", [])}
 
-@app.post("/execute_analysis")
-def execute_analysis(user_email: str = Depends(get_current_user)):
-    user_ref = db.collection("users").document(user_email)
-    user_data = user_ref.get().to_dict()
-    user_stocks = user_data.get("stocks", [])
-    if not user_stocks:
-        return {"status": "No stocks to analyze", "results": []}
+async def run_analysis(job: Job, user_email: str, user_stocks: List[str]) -> Dict:
+    """Analyze a user's watchlist, reporting each stock's result on the job as it finishes.
+
+    Results go to the shared tickers/{symbol} documents, so a ticker held by many users is stored once.
+    """
 
-    results = []
-    for stock in user_stocks:
+    # %K/%D and zone for every ticker at once, from bars kept up to date in the OHLC store
+    analysis = await precompute.analyze_symbols(user_stocks)
+
+    writes = []
+
+    async def analyze(stock: str) -> Dict:
         stock = stock.upper()
         try:
-            # Fetch latest price
-            ticker = yf.Ticker(stock)
-            latest_price = ticker.history(period='1d')['Close'].iloc[-1]
-
-            # Calculate stochastic oscillator
-            latest_k, latest_d = calculate_stochastic(stock)
-            zone = determine_zone(latest_k, latest_d)
-            decision = decide_action(zone)
-
-            # Log to Firestore
-            stock_analysis_ref = user_ref.collection("stock_analysis").document(stock)
-            stock_analysis_ref.set({
-                "Stock Name": stock,
-                "Price": latest_price,
-                "%K": latest_k,
-                "%D": latest_d,
-                "Zone": zone,
-                "Decision": decision,
-                "Last Updated": datetime.utcnow()
-            })
-
-            # Scrape American Bull Info
-            american_bull_data = specific_stock(stock)
-            # Assuming american_bull_data is a list; take the latest entry
-            if american_bull_data:
-                latest_bull = american_bull_data[0]
-                american_bull_ref = user_ref.collection("american_bull_info").document(stock)
-                american_bull_ref.set({
-                    "Stock Name": stock,
-                    "Signal": latest_bull.get("Signal", "N/A"),
-                    "Date": latest_bull.get("Date", "N/A"),
-                    "Price": latest_bull.get("Price", "N/A"),
-                    "Change%": latest_bull.get("Change%", "N/A"),
-                    "Value": latest_bull.get("Value", "N/A"),
-                    "Last Updated": datetime.utcnow()
-                })
-            else:
-                american_bull_ref = user_ref.collection("american_bull_info").document(stock)
-                american_bull_ref.set({
-                    "Stock Name": stock,
-                    "Signal": "N/A",
-                    "Date": "N/A",
-                    "Price": "N/A",
-                    "Change%": "N/A",
-                    "Value": "N/A",
-                    "Last Updated": datetime.utcnow()
-                })
-
-            results.append({"stock": stock, "price": latest_price, "analysis": decision})
+            if stock not in analysis:
+                raise ValueError(f"No price data found for {stock}")
+            record = analysis[stock]
+
+            # Queue the Firestore writes; they're flushed in batches once every stock is done
+            doc = {"symbol": stock, "analysis": record}
+            american_bull = await precompute.american_bull_record(stock)
+            if precompute.has_signal(american_bull):
+                doc["american_bull"] = american_bull
+            writes.append(("merge", precompute.ticker_ref(db, stock), doc))
+
+            result = {"stock": stock, "price": record["Price"], "analysis": record["Decision"]}
         except Exception as e:
             logger.error(f"Error analyzing stock {stock}: {e}")
-            results.append({"stock": stock, "error": str(e)})
+            result = {"stock": stock, "error": str(e)}
+        job.add_result(result)
+        return result
+
+    # American Bulls lookups run concurrently (within the host's limits)
+    results = await asyncio.gather(*(analyze(stock) for stock in user_stocks))
+
+    # One document per stock, committed in as few batches as Firestore allows
+    failed = await asyncio.to_thread(commit_writes, db, writes)
+    failed_stocks = {ref.id for _, ref, _ in failed}
+    for result in results:
+        if result["stock"] in failed_stocks:
+            result["error"] = "Failed to save analysis results."
 
     return {"status": "Analysis executed", "results": results}
 
+@app.post("/execute_analysis")
+def execute_analysis(request: Request, user_email: str = Depends(get_current_user)):
+    """Queue an analysis of the user's watchlist; poll /analysis_jobs/{job_id} for progress."""
+    user_data = current_user_doc(request, user_email)
+    user_stocks = user_data.get("stocks", [])
+    if not user_stocks:
+        return {"status": "No stocks to analyze", "results": []}
+
+    job, created = analysis_jobs.submit(user_email, run_analysis, user_email, user_stocks, total=len(user_stocks))
+    status = "Analysis queued" if created else "Analysis already in progress"
+    return {"status": status, "job_id": job.id, "results": []}
+
+@app.post("/execute_analysis/stream")
+async def stream_execute_analysis(request: Request, format: Optional[str] = Query(None),
+                                  user_email: str = Depends(get_current_user)):
+    """Queue (or join) the user's analysis job and stream each stock's result as it finishes (SSE or NDJSON)."""
+    user_data = current_user_doc(request, user_email)
+    user_stocks = user_data.get("stocks", [])
+
+    async def events():
+        if not user_stocks:
+            yield {"event": "done", "status": "No stocks to analyze", "completed": 0, "total": 0}
+            return
+        job, created = analysis_jobs.submit(user_email, run_analysis, user_email, user_stocks, total=len(user_stocks))
+        yield {"event": "job", "job_id": job.id, "total": job.total,
+               "status": "Analysis queued" if created else "Analysis already in progress"}
+        completed = 0
+        async for result in job.follow():
+            completed += 1
+            yield {"event": "result", **result, "completed": completed, "total": job.total}
+        yield {"event": "done", "status": job.status, "error": job.error, "completed": completed, "total": job.total}
+
+    return streaming.stream_events(request, events(), format)
+
+@app.get("/analysis_jobs")
+def get_latest_analysis_job(user_email: str = Depends(get_current_user)):
+    """The user's most recent analysis job, if any."""
+    job = analysis_jobs.latest(user_email)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No analysis jobs found.")
+    return job.to_dict()
+
+@app.get("/analysis_jobs/{job_id}")
+def get_analysis_job(job_id: str, user_email: str = Depends(get_current_user)):
+    """Progress and partial results of an analysis job."""
+    job = analysis_jobs.get(job_id)
+    if job is None or job.key != user_email:
+        raise HTTPException(status_code=404, detail="Analysis job not found.")
+    return job.to_dict()
+
 @app.get("/stock_analysis")
-def get_stock_analysis(user_email: str = Depends(get_current_user)):
-    user_ref = db.collection("users").document(user_email)
-    stock_analysis_ref = user_ref.collection("stock_analysis")
-    docs = stock_analysis_ref.stream()
-    analysis_data = []
-    for doc in docs:
-        data = doc.to_dict()
-        analysis_data.append(data)
-    return {"stock_analysis": analysis_data}
+def get_stock_analysis(request: Request, user_email: str = Depends(get_current_user)):
+    stocks = current_user_doc(request, user_email).get("stocks", [])
+    return {"stock_analysis": precompute.read_shared(db, stocks, "analysis")}
 
 @app.get("/american_bull_info")
-def get_american_bull_info(user_email: str = Depends(get_current_user)):
-    user_ref = db.collection("users").document(user_email)
-    american_bull_ref = user_ref.collection("american_bull_info")
-    docs = american_bull_ref.stream()
-    bull_data = []
-    for doc in docs:
-        data = doc.to_dict()
-        bull_data.append(data)
-    return {"american_bull_info": bull_data}
+def get_american_bull_info(request: Request, user_email: str = Depends(get_current_user)):
+    stocks = current_user_doc(request, user_email).get("stocks", [])
+    return {"american_bull_info": precompute.read_shared(db, stocks, "american_bull")}
+
+async def shared_or_scrape(source: str, stocks: List[str], scrape) -> List:
+    """Per-ticker results for a scrape source: precomputed ones from tickers/{symbol} while fresh, the rest scraped now."""
+    shared = await asyncio.to_thread(precompute.read_scrapes, db, stocks, source)
+    missing = [stock for stock in stocks if stock.upper() not in shared]
+    scraped = dict(zip(missing, await scrape(missing))) if missing else {}
+    return [shared[stock.upper()] if stock.upper() in shared else scraped[stock] for stock in stocks]
+
+def json_response(content, headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON response for large bodies, encoded with orjson when installed (see workers.encode_json)."""
+    return Response(workers.encode_json(content), media_type="application/json", headers=headers)
 
 @app.get("/barchart_opinion_info")
-def get_barchart_opinion_info(user_email: str = Depends(get_current_user)):
-    user_ref = db.collection("users").document(user_email)
-    user_data = user_ref.get().to_dict()
+async def get_barchart_opinion_info(request: Request, user_email: str = Depends(get_current_user)):
+    user_data = current_user_doc(request, user_email)
     stocks = user_data.get("stocks", [])
     if not stocks:
         return {"error" : "No stocks to analyze."}
 
-    results = []
-    for ticker in stocks:
-        result = scrapers.scrape_barchart_opinion(ticker)  #scraper subroutine
-        results.append(result) 
+    results = await shared_or_scrape("barchart", stocks, scrapers.scrape_barchart_opinions)
     return {"barchart_opinion_info" : results}
 
+async def trades_since(source: str, stocks: List[str], since: float, scrape):
+    """Each ticker's trades first seen after `since` (epoch seconds), from the local trade store.
+
+    Tickers not scraped into the store within the source's TTL are scraped first. The returned
+    as_of is the `since` to pass next time to get only what arrived after this call: it is taken
+    after the scrape, and rows stored later than it are left for the next call.
+    """
+    synced = await asyncio.to_thread(trade_store.store.synced_at, source, stocks)
+    stale = [stock for stock in stocks if time.time() - synced.get(stock.upper(), 0) > ttl_for(source)]
+    if stale:
+        await scrape(stale)
+    as_of = await asyncio.to_thread(trade_store.store.watermark)
+    trades = await asyncio.gather(*(asyncio.to_thread(trade_store.store.trades, source, stock, since, None, as_of)
+                                    for stock in stocks))
+    return trades, as_of
+
 @app.get("/congress_trades")
-async def get_congress_trades(user_email: str = Depends(get_current_user)):
-    user_ref = db.collection("users").document(user_email)
-    user_data = user_ref.get().to_dict()
+async def get_congress_trades(request: Request, since: Optional[float] = Query(None),
+                              user_email: str = Depends(get_current_user)):
+    user_data = current_user_doc(request, user_email)
     stocks = user_data.get("stocks", [])
     if not stocks:
         return {"error" : "No stocks to analyze."}
 
-    results = await scrapers.scrape_congress_trades(stocks)
+    if since is not None:
+        trades, as_of = await trades_since("congress", stocks, since, scrapers.scrape_congress_trades)
+        return {"congress_trades": trades, "since": since, "as_of": as_of}
+
+    results = await shared_or_scrape("congress", stocks, scrapers.scrape_congress_trades)
     return {"congress_trades" : results}
 
 @app.get("/market_beat_info")
-async def get_congress_trades(user_email: str = Depends(get_current_user)):
-    user_ref = db.collection("users").document(user_email)
-    user_data = user_ref.get().to_dict()
+async def get_congress_trades(request: Request, user_email: str = Depends(get_current_user)):
+    user_data = current_user_doc(request, user_email)
     stocks = user_data.get("stocks", [])
     if not stocks:
         return {"error" : "No stocks to analyze."}
 
-    results = await scrapers.scrape_market_beat(stocks)
+    results = await shared_or_scrape("market_beat", stocks, scrapers.scrape_market_beat)
     return {"market_beat_info" : results}
 
 @app.get("/insider_trades")
-async def get_congress_trades(user_email: str = Depends(get_current_user)):
-    user_ref = db.collection("users").document(user_email)
-    user_data = user_ref.get().to_dict()
+async def get_congress_trades(request: Request, since: Optional[float] = Query(None), format: Optional[str] = Query(None),
+                              user_email: str = Depends(get_current_user)):
+    """Insider trades per stock; ?format=columnar (or the columnar Accept type) returns typed arrays per ticker."""
+    user_data = current_user_doc(request, user_email)
     stocks = user_data.get("stocks", [])
     if not stocks:
         return {"error" : "No stocks to analyze."}
 
-    results = await scrapers.scrape_insider_trades(stocks)
-    return {"insider_trades" : results}
+    extra = {}
+    if since is not None:
+        trades, as_of = await trades_since("insider", stocks, since, scrapers.scrape_insider_trades)
+        results = [{stock: stock_trades} for stock, stock_trades in zip(stocks, trades)]
+        extra = {"since": since, "as_of": as_of}
+    else:
+        results = await shared_or_scrape("insider", stocks, scrapers.scrape_insider_trades)
+
+    # Both formats vary on Accept, so a cache in front of the API keeps them apart
+    if columnar.wants_columnar(request, format):
+        body = await cpu_workers.run(columnar.encode_insider, stocks, results, extra)
+        return Response(body, media_type=columnar.MEDIA_TYPE, headers={"Vary": "Accept"})
+    return json_response({"insider_trades" : results, **extra}, headers={"Vary": "Accept"})
+
+@app.get("/congress_trades/stream")
+async def stream_congress_trades(request: Request, format: Optional[str] = Query(None), user_email: str = Depends(get_current_user)):
+    """Per-ticker congress_trades results as each ticker finishes (SSE or NDJSON)."""
+    stocks = current_user_doc(request, user_email).get("stocks", [])
+    results = streaming.ticker_events(scrapers.stream_congress_trades(stocks), "congress_trades", len(stocks))
+    return streaming.stream_events(request, results, format)
+
+@app.get("/market_beat_info/stream")
+async def stream_market_beat_info(request: Request, format: Optional[str] = Query(None), user_email: str = Depends(get_current_user)):
+    """Per-ticker market_beat_info results as each ticker finishes (SSE or NDJSON)."""
+    stocks = current_user_doc(request, user_email).get("stocks", [])
+    results = streaming.ticker_events(scrapers.stream_market_beat(stocks), "market_beat_info", len(stocks))
+    return streaming.stream_events(request, results, format)
+
+@app.get("/insider_trades/stream")
+async def stream_insider_trades(request: Request, format: Optional[str] = Query(None), user_email: str = Depends(get_current_user)):
+    """Per-ticker insider_trades results as each ticker finishes (SSE or NDJSON)."""
+    stocks = current_user_doc(request, user_email).get("stocks", [])
+    results = streaming.ticker_events(scrapers.stream_insider_trades(stocks), "insider_trades", len(stocks))
+    return streaming.stream_events(request, results, format)
+
+@app.get("/dashboard")
+async def get_dashboard(request: Request, user_email: str = Depends(get_current_user)):
+    """Everything the dashboard shows in one response.
+
+    The watchlist is read once and every source runs concurrently with its own
+    timeout (see dashboard.py); sources that time out or fail come back as null,
+    with their status under "sources" and "partial" set.
+    """
+    user_data = current_user_doc(request, user_email)
+    stocks = user_data.get("stocks", [])
+
+    async def scraped(source, scrape):
+        return await shared_or_scrape(source, stocks, scrape) if stocks else []
+
+    payload = await dashboard.gather_sources({
+        "stock_analysis": lambda: asyncio.to_thread(precompute.read_shared, db, stocks, "analysis"),
+        "american_bull_info": lambda: asyncio.to_thread(precompute.read_shared, db, stocks, "american_bull"),
+        "barchart_opinion_info": lambda: scraped("barchart", scrapers.scrape_barchart_opinions),
+        "market_beat_info": lambda: scraped("market_beat", scrapers.scrape_market_beat),
+        "congress_trades": lambda: scraped("congress", scrapers.scrape_congress_trades),
+        "insider_trades": lambda: scraped("insider", scrapers.scrape_insider_trades),
+    })
+    payload["stocks"] = stocks
+    return json_response(payload)
 
 @app.post("/delete_all_stocks")
-def delete_all_stocks(user_email: str = Depends(get_current_user)):
+def delete_all_stocks(request: Request, user_email: str = Depends(get_current_user)):
     user_ref = db.collection("users").document(user_email)
     
-    # Get current stocks
-    user_data = user_ref.get().to_dict()
-    stocks = user_data.get("stocks", [])
+    # Get current stocks, not the cached list
+    stocks = fresh_stocks(user_email)
     
     if not stocks:
         return {"message": "No stocks to delete."}
     
     # Update the stocks array to empty
     user_ref.update({"stocks": []})
+    user_docs.invalidate(user_email)
     
-    # Batch delete documents in stock_analysis and american_bull_info
-    stock_analysis_ref = user_ref.collection("stock_analysis")
-    american_bull_ref = user_ref.collection("american_bull_info")
-    
-    batch = db.batch()
-    
-    # Delete all documents in stock_analysis
-    for doc in stock_analysis_ref.stream():
-        batch.delete(doc.reference)
-    
-    # Delete all documents in american_bull_info
-    for doc in american_bull_ref.stream():
-        batch.delete(doc.reference)
-    
-    batch.commit()
-    
+    # Analysis data is shared per ticker in tickers/{symbol}; delete what's left from the old per-user layout
+    if commit_writes(db, precompute.legacy_deletes(user_ref)):
+        raise HTTPException(status_code=500, detail="Failed to delete some analysis data.")
     return {"message": "All stocks and associated data have been deleted."}
 
+@app.get("/stats")
+def get_stats(user_email: str = Depends(get_current_user)):
+    """Runtime stats for the shared backend subsystems (aggregate counters only, nothing per user)."""
+    if user_email.strip().lower() not in STATS_ADMINS:
+        raise HTTPException(status_code=403, detail="Not allowed to read backend stats.")
+    return {
+        "browser_pool": browser_pool.stats(),
+        "scrape_hosts": throttle.stats(),
+        "page_loads": page_loads.stats(),
+        "fetchers": scrapers.fetcher_stats(),
+        "http_client": http_client.stats(),
+        "instruments": instruments.stats(),
+        "orders": order_store.store.stats(),
+        "trades": trade_store.store.stats(),
+        "scrape_cache": scrape_cache.stats(),
+        "ohlc_store": ohlc_store.store.stats(),
+        "analysis_jobs": analysis_jobs.stats(),
+        "user_docs": user_docs.stats(),
+        "auth_tokens": verified_tokens.stats(),
+        "precompute": precomputer.stats(),
+        "workers": cpu_workers.stats(),
+        "compression": compression.stats(),
+    }
+
 @app.get("/")
 def root():
     return {"message": "API is running!"}
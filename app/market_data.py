@@ -0,0 +1,71 @@
+"""Batched OHLC downloads from Yahoo Finance.
+
+The analysis pipeline pulls daily bars for the whole watchlist with one
+multi-ticker ``yf.download`` call and reads both the latest price and the
+stochastic inputs from that frame. Per-symbol downloads are only used as a
+fallback for tickers that came back empty from the batch.
+"""
+import logging
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+logger = logging.getLogger("market_data")
+
+
+def ticker_frame(data: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """Pull one ticker's OHLC columns out of a yf.download result, dropping rows it has no bars for."""
+    if data is None or data.empty:
+        return pd.DataFrame()
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol not in data.columns.get_level_values(0):
+            return pd.DataFrame()
+        data = data[symbol]
+    return data.dropna(how="all")
+
+
+#split- and dividend-adjusted bars, stated rather than left to yfinance's default (ohlc_store relies on it)
+AUTO_ADJUST = True
+
+
+def _range(period: str, start: Optional[str]) -> dict:
+    #an explicit start date wins over the lookback period
+    return {"start": start} if start else {"period": period}
+
+
+def download_symbol(symbol: str, period: str = "1mo", interval: str = "1d", start: Optional[str] = None) -> pd.DataFrame:
+    """Single-ticker download, used as the fallback path."""
+    data = yf.download(symbol, interval=interval, group_by="ticker", auto_adjust=AUTO_ADJUST, progress=False,
+                       **_range(period, start))
+    return ticker_frame(data, symbol)
+
+
+def download_ohlc(symbols: List[str], period: str = "1mo", interval: str = "1d",
+                  start: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """Download OHLC for all symbols in one request; returns {symbol: frame} with empty frames for failures.
+
+    Pass `start` (YYYY-MM-DD) instead of `period` to fetch only bars from that date on.
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    if not symbols:
+        return {}
+
+    try:
+        batch = yf.download(symbols, interval=interval, group_by="ticker", auto_adjust=AUTO_ADJUST, threads=True,
+                            progress=False, **_range(period, start))
+    except Exception as e:
+        logger.error(f"Batch download failed for {len(symbols)} symbols: {e}")
+        batch = None
+
+    frames = {symbol: ticker_frame(batch, symbol) for symbol in symbols}
+
+    failed = [symbol for symbol, frame in frames.items() if frame.empty]
+    if failed:
+        logger.warning(f"Batch download missing {len(failed)} symbol(s), retrying individually: {failed}")
+    for symbol in failed:
+        try:
+            frames[symbol] = download_symbol(symbol, period=period, interval=interval, start=start)
+        except Exception as e:
+            logger.error(f"Download failed for {symbol}: {e}")
+    return frames
@@ -0,0 +1,47 @@
+"""One-off cleanup of the per-user analysis subcollections.
+
+Analysis used to be stored per user in users/{email}/stock_analysis and
+users/{email}/american_bull_info; it now lives in the shared tickers/{symbol}
+documents (see precompute.py) and the old documents are never read again.
+This deletes them for every user. Safe to run more than once:
+
+    python migrate_legacy_analysis.py            # delete
+    python migrate_legacy_analysis.py --dry-run  # only count
+"""
+import logging
+import os
+import sys
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+from firestore_writes import commit_writes
+from precompute import legacy_deletes
+
+logger = logging.getLogger("migrate_legacy_analysis")
+
+
+def migrate(db, dry_run: bool = False) -> dict:
+    users = deleted = failed = 0
+    #list_documents also finds users whose own document is gone but whose subcollections aren't
+    for user_ref in db.collection("users").list_documents():
+        deletes = legacy_deletes(user_ref)
+        if not deletes:
+            continue
+        users += 1
+        if dry_run:
+            deleted += len(deletes)
+            continue
+        failures = commit_writes(db, deletes)
+        deleted += len(deletes) - len(failures)
+        failed += len(failures)
+    return {"users": users, "deleted": deleted, "failed": failed}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    firebase_admin.initialize_app(credentials.Certificate(
+        os.path.join(os.path.dirname(__file__), "serviceAccountKey.json")))
+    result = migrate(firestore.client(), dry_run="--dry-run" in sys.argv[1:])
+    logger.info(f"Legacy analysis documents: {result}")
+    sys.exit(1 if result["failed"] else 0)
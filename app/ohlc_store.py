@@ -0,0 +1,204 @@
+"""Local OHLC history store for the analysis pipeline.
+
+Daily bars are kept in a SQLite file keyed by (symbol, date). A refresh only
+downloads bars newer than the last stored date for each symbol (re-fetching
+that last bar, since today's bar keeps changing until the close), and symbols
+refreshed within OHLC_REFRESH_SECONDS are not fetched at all. The stochastic
+windows are then read back as a short per-symbol tail instead of recomputing
+from a freshly downloaded month of bars.
+
+Bars are split- and dividend-adjusted (market_data downloads with
+auto_adjust=True), and Yahoo re-adjusts every earlier bar after a split or
+dividend. So each incremental download also re-fetches the closed bar before
+the last stored one; if its close no longer matches the stored close, the
+stored history is out of date and the symbol is re-downloaded cold and
+replaced, so a window never mixes old and new adjustments.
+"""
+import itertools
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+import pandas as pd
+
+import market_data
+
+logger = logging.getLogger("ohlc_store")
+
+STORE_PATH = os.getenv("OHLC_STORE_PATH", "ohlc-history.sqlite3")
+#symbols refreshed more recently than this are served from the store as-is
+REFRESH_SECONDS = float(os.getenv("OHLC_REFRESH_SECONDS", "60"))
+#lookback used the first time a symbol is seen
+COLD_PERIOD = "1mo"
+#relative difference in a re-fetched close that means the history was re-adjusted
+ADJUSTMENT_TOLERANCE = float(os.getenv("OHLC_ADJUSTMENT_TOLERANCE", "1e-4"))
+
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+
+class OHLCStore:
+    def __init__(self, path: str = STORE_PATH, refresh_seconds: float = REFRESH_SECONDS):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS bars (
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (symbol, date)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS symbols (
+                symbol TEXT PRIMARY KEY,
+                last_date TEXT,
+                refreshed_at REAL
+            );
+        """)
+        self._conn.commit()
+        self.downloads = 0
+        self.bars_fetched = 0
+        self.skipped_fresh = 0
+        self.readjusted = 0
+
+    def _meta(self, symbols: List[str]) -> Dict[str, tuple]:
+        placeholders = ",".join("?" * len(symbols))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT symbol, last_date, refreshed_at FROM symbols WHERE symbol IN ({placeholders})", symbols
+            ).fetchall()
+        return {symbol: (last_date, refreshed_at) for symbol, last_date, refreshed_at in rows}
+
+    def _check_dates(self, symbols: List[str]) -> Dict[str, str]:
+        '''per symbol, the stored bar before the last one: closed, so a re-download must reproduce it'''
+        dates = {}
+        with self._lock:
+            for symbol in symbols:
+                rows = self._conn.execute(
+                    "SELECT date FROM bars WHERE symbol = ? ORDER BY date DESC LIMIT 2", (symbol,)
+                ).fetchall()
+                if rows:
+                    dates[symbol] = rows[-1][0]
+        return dates
+
+    def _same_adjustment(self, symbol: str, frame: pd.DataFrame, date: str) -> bool:
+        '''whether the re-fetched close on `date` still matches the stored one'''
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT close FROM bars WHERE symbol = ? AND date = ?", (symbol, date)
+            ).fetchone()
+        fetched = frame["Close"][frame.index.strftime("%Y-%m-%d") == date]
+        if row is None or row[0] is None or fetched.empty or pd.isna(fetched.iloc[0]):
+            return False
+        return math.isclose(float(fetched.iloc[0]), row[0], rel_tol=ADJUSTMENT_TOLERANCE)
+
+    def upsert(self, symbol: str, frame: pd.DataFrame, replace: bool = False):
+        '''store bars for one symbol, overwriting any dates already present (all stored bars with `replace`)'''
+        frame = frame.dropna(subset=["High", "Low", "Close"], how="all")
+        if frame.empty:
+            return
+        rows = [
+            (symbol, date.strftime("%Y-%m-%d"), *(None if pd.isna(v) else float(v) for v in values))
+            for date, values in zip(frame.index, frame[list(COLUMNS)].itertuples(index=False, name=None))
+        ]
+        last_date = rows[-1][1]
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute("DELETE FROM bars WHERE symbol = ?", (symbol,))
+                self._conn.execute("DELETE FROM symbols WHERE symbol = ?", (symbol,))
+            self._conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute(
+                "INSERT INTO symbols VALUES (?, ?, ?) ON CONFLICT(symbol) DO UPDATE SET "
+                "last_date = MAX(COALESCE(last_date, ''), excluded.last_date), refreshed_at = excluded.refreshed_at",
+                (symbol, last_date, time.time()),
+            )
+
+    def refresh(self, symbols: List[str]):
+        '''bring the store up to date for these symbols with as few batched downloads as possible'''
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        if not symbols:
+            return
+        meta = self._meta(symbols)
+        now = time.time()
+
+        stale = [s for s in symbols if s not in meta or now - (meta[s][1] or 0) > self.refresh_seconds]
+        self.skipped_fresh += len(symbols) - len(stale)
+        cold = [s for s in stale if not (meta.get(s) or (None,))[0]]
+        check_dates = self._check_dates([s for s in stale if s not in cold])
+        cold += [s for s in stale if s not in cold and s not in check_dates]
+        warm = sorted(check_dates, key=check_dates.get)
+
+        batches = []
+        if cold:
+            batches.append((cold, {"period": COLD_PERIOD}))
+        #one download per distinct check date (normally just one), starting at that date
+        for check_date, group in itertools.groupby(warm, key=check_dates.get):
+            batches.append((list(group), {"start": check_date}))
+
+        readjusted = []
+        for batch, date_range in batches:
+            self.downloads += 1
+            frames = market_data.download_ohlc(batch, interval="1d", **date_range)
+            for symbol, frame in frames.items():
+                if frame is None or frame.empty:
+                    logger.warning(f"No new bars for {symbol}")
+                elif symbol in check_dates and not self._same_adjustment(symbol, frame, check_dates[symbol]):
+                    readjusted.append(symbol)
+                else:
+                    self.bars_fetched += len(frame)
+                    self.upsert(symbol, frame)
+
+        if readjusted:
+            #a split or dividend re-adjusted the stored history: replace it rather than splice onto it
+            logger.info(f"Re-adjusted history for {len(readjusted)} symbol(s), downloading again: {readjusted}")
+            self.readjusted += len(readjusted)
+            self.downloads += 1
+            frames = market_data.download_ohlc(readjusted, interval="1d", period=COLD_PERIOD)
+            for symbol, frame in frames.items():
+                if frame is not None and not frame.empty:
+                    self.bars_fetched += len(frame)
+                    self.upsert(symbol, frame, replace=True)
+                else:
+                    logger.warning(f"No bars for {symbol}")
+
+    def tail(self, symbols: List[str], bars: int) -> Dict[str, pd.DataFrame]:
+        '''the last `bars` stored bars per symbol, oldest first, shaped like a yf.download frame'''
+        frames = {}
+        with self._lock:
+            for symbol in dict.fromkeys(s.upper() for s in symbols):
+                rows = self._conn.execute(
+                    "SELECT date, open, high, low, close, volume FROM bars WHERE symbol = ? "
+                    "ORDER BY date DESC LIMIT ?", (symbol, bars)
+                ).fetchall()
+                rows.reverse()
+                frames[symbol] = pd.DataFrame(
+                    [row[1:] for row in rows],
+                    index=pd.DatetimeIndex([row[0] for row in rows], name="Date"),
+                    columns=list(COLUMNS),
+                    dtype="float64",
+                )
+        return frames
+
+    def stats(self) -> dict:
+        with self._lock:
+            symbols, bars = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM symbols), (SELECT COUNT(*) FROM bars)"
+            ).fetchone()
+        return {
+            "path": self.path,
+            "symbols": symbols,
+            "bars": bars,
+            "downloads": self.downloads,
+            "bars_fetched": self.bars_fetched,
+            "skipped_fresh": self.skipped_fresh,
+            "readjusted": self.readjusted,
+        }
+
+
+#shared instance used by the analysis pipeline
+store = OHLCStore()
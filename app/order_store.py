@@ -0,0 +1,118 @@
+"""Local per-user store of Robinhood stock orders, synced incrementally.
+
+Each login used to download the user's whole order history. Orders are now
+kept in a SQLite file keyed by (user, order id) together with a per-user
+cursor: the newest `updated_at` seen so far. A sync only asks Robinhood for
+orders updated since the cursor (robin_stocks' start_date maps to the API's
+updated_at[gte] filter), upserts them, and advances the cursor; orders that
+changed state since the last sync are simply replaced. Filled orders are
+served back from an index sorted by transaction time.
+
+A full resync (full=True) re-downloads everything and replaces the user's rows.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("order_store")
+
+STORE_PATH = os.getenv("ORDER_STORE_PATH", "orders.sqlite3")
+
+
+class OrderSyncError(Exception):
+    """Robinhood didn't return a usable order list (robin_stocks returns [None] on HTTP errors)."""
+
+
+class OrderStore:
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS orders (
+                user TEXT NOT NULL,
+                id TEXT NOT NULL,
+                updated_at TEXT,
+                state TEXT,
+                last_transaction_at TEXT,
+                data TEXT NOT NULL,
+                PRIMARY KEY (user, id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS orders_by_time ON orders (user, state, last_transaction_at);
+            CREATE TABLE IF NOT EXISTS order_cursors (
+                user TEXT PRIMARY KEY,
+                updated_at TEXT,
+                synced_at REAL
+            );
+        """)
+        self._conn.commit()
+        self.incremental_syncs = 0
+        self.full_syncs = 0
+        self.orders_fetched = 0
+
+    def cursor(self, user: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT updated_at FROM order_cursors WHERE user = ?", (user,)).fetchone()
+        return row[0] if row else None
+
+    def sync(self, user: str, fetch_orders: Callable[..., List[dict]], full: bool = False) -> int:
+        '''pull orders updated since the user's cursor (or all of them) into the store; returns how many were fetched.
+
+        fetch_orders(start_date=...) is r.orders.get_all_stock_orders or anything shaped like it.
+        '''
+        cursor = None if full else self.cursor(user)
+        orders = fetch_orders(start_date=cursor) if cursor else fetch_orders()
+        if orders is None or any(order is None for order in orders):
+            raise OrderSyncError("Could not fetch orders from Robinhood.")
+
+        rows = [
+            (user, order["id"], order.get("updated_at"), order.get("state"),
+             order.get("last_transaction_at"), json.dumps(order))
+            for order in orders
+        ]
+        newest = max([row[2] for row in rows if row[2]] + ([cursor] if cursor else []), default=None)
+        with self._lock, self._conn:
+            if full:
+                self._conn.execute("DELETE FROM orders WHERE user = ?", (user,))
+            self._conn.executemany("INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute("INSERT OR REPLACE INTO order_cursors VALUES (?, ?, ?)", (user, newest, time.time()))
+
+        if full or cursor is None:
+            self.full_syncs += 1
+        else:
+            self.incremental_syncs += 1
+        self.orders_fetched += len(orders)
+        logger.info(f"Synced {len(orders)} order(s) for {user} ({'full' if full or cursor is None else 'since ' + cursor})")
+        return len(orders)
+
+    def filled(self, user: str) -> List[dict]:
+        '''the user's filled orders, newest transaction first'''
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM orders WHERE user = ? AND state = 'filled' ORDER BY last_transaction_at DESC",
+                (user,),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            users, orders = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM order_cursors), (SELECT COUNT(*) FROM orders)"
+            ).fetchone()
+        return {
+            "path": self.path,
+            "users": users,
+            "orders": orders,
+            "incremental_syncs": self.incremental_syncs,
+            "full_syncs": self.full_syncs,
+            "orders_fetched": self.orders_fetched,
+        }
+
+
+#shared instance used by validate_and_fetch_trades
+store = OrderStore()
@@ -0,0 +1,211 @@
+"""Lightweight page loads for the Playwright scrapers.
+
+The scrapers only read the HTML, so their pages don't need images, fonts,
+stylesheets, ads or analytics. install() adds request interception to a
+leased page that aborts:
+
+  * resource types in PAGE_BLOCK_RESOURCE_TYPES (image, media, font, stylesheet
+    by default), and
+  * requests to known ad/analytics/tracking domains (BLOCKED_DOMAINS plus any
+    in PAGE_BLOCK_DOMAINS).
+
+Instead of waiting for 'networkidle', load() waits for the one selector each
+source actually parses (WAIT_FOR) and reads the HTML as soon as it is there.
+A page with no data never shows the selector, so load() also stops waiting
+PAGE_EMPTY_GRACE ms after the page's network goes idle without it, rather
+than sitting out the whole PAGE_SELECTOR_TIMEOUT.
+Every load records its time, transferred bytes and blocked requests; totals per
+source are exposed through stats(). Set PAGE_BLOCKING=0 to turn interception off.
+"""
+import asyncio
+import logging
+import os
+import time
+import weakref
+from typing import Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("page_loads")
+
+BLOCKING_ENABLED = os.getenv("PAGE_BLOCKING", "1") != "0"
+
+BLOCKED_RESOURCE_TYPES = frozenset(
+    t.strip() for t in os.getenv("PAGE_BLOCK_RESOURCE_TYPES", "image,media,font,stylesheet").split(",") if t.strip()
+)
+
+#third-party ad, analytics and tracking hosts (subdomains included)
+BLOCKED_DOMAINS = frozenset([
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com",
+    "facebook.net", "facebook.com", "connect.facebook.net", "twitter.com", "ads-twitter.com",
+    "amazon-adsystem.com", "adnxs.com", "criteo.com", "criteo.net", "taboola.com", "outbrain.com",
+    "pubmatic.com", "rubiconproject.com", "openx.net", "casalemedia.com", "moatads.com",
+    "scorecardresearch.com", "quantserve.com", "quantcount.com", "chartbeat.com", "chartbeat.net",
+    "hotjar.com", "segment.io", "segment.com", "mixpanel.com", "amplitude.com", "optimizely.com",
+    "nr-data.net", "newrelic.com", "clarity.ms", "bing.com", "adsrvr.org", "sharethrough.com",
+    "media.net", "33across.com", "lijit.com", "sovrn.com", "teads.tv", "onetrust.com", "cookielaw.org",
+] + [d.strip() for d in os.getenv("PAGE_BLOCK_DOMAINS", "").split(",") if d.strip()])
+
+#the element each source parses; the page is read as soon as it is in the DOM
+WAIT_FOR = {
+    "congress": "div.content-item.item-gov table tbody tr",
+    "market_beat": "div#marketRankAccordion",
+    "insider": "table tbody tr",
+    "barchart": "div.note-button a[data-symbol]",
+}
+
+#how long to wait for the selector before reading whatever has loaded (pages without data never show it)
+SELECTOR_TIMEOUT = float(os.getenv("PAGE_SELECTOR_TIMEOUT", "15000"))
+#how long after the network goes idle a page still gets to render the selector
+EMPTY_GRACE = float(os.getenv("PAGE_EMPTY_GRACE", "1000"))
+
+
+def is_blocked_host(url: str) -> bool:
+    host = urlsplit(url).hostname or ""
+    parts = host.split(".")
+    return any(".".join(parts[i:]) in BLOCKED_DOMAINS for i in range(len(parts) - 1))
+
+
+class _Load:
+    """Counters for one page load."""
+
+    def __init__(self):
+        self.requests = 0
+        self.blocked = 0
+        self.bytes = 0
+        self.pending = set()
+
+
+class _SourceTotals:
+    def __init__(self):
+        self.pages = 0
+        self.seconds = 0.0
+        self.requests = 0
+        self.blocked = 0
+        self.bytes = 0
+        self.selector_timeouts = 0
+        self.settled_without_selector = 0
+
+    def to_dict(self) -> dict:
+        pages = self.pages or 1
+        return {
+            "pages": self.pages,
+            "requests": self.requests,
+            "blocked": self.blocked,
+            "bytes": self.bytes,
+            "selector_timeouts": self.selector_timeouts,
+            "settled_without_selector": self.settled_without_selector,
+            "avg_kb_per_page": round(self.bytes / pages / 1024, 1),
+            "avg_seconds_per_page": round(self.seconds / pages, 3),
+        }
+
+
+#page -> load in progress on it
+_current = weakref.WeakKeyDictionary()
+_totals = {}
+
+
+def _load_for(page) -> Optional[_Load]:
+    return _current.get(page)
+
+
+async def _measure(load: _Load, request):
+    try:
+        sizes = await request.sizes()
+        load.bytes += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+    except Exception:
+        #the page or context may already be closed
+        pass
+
+
+async def install(page):
+    '''abort unneeded requests on this page and count what it transfers'''
+    async def route(route):
+        request = route.request
+        load = _load_for(page)
+        if BLOCKING_ENABLED and (request.resource_type in BLOCKED_RESOURCE_TYPES or is_blocked_host(request.url)):
+            if load:
+                load.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def finished(request):
+        load = _load_for(page)
+        if load:
+            load.requests += 1
+            task = asyncio.ensure_future(_measure(load, request))
+            load.pending.add(task)
+            task.add_done_callback(load.pending.discard)
+
+    await page.route("**/*", route)
+    page.on("requestfinished", finished)
+
+
+async def _settled(page):
+    '''the page's network went idle and EMPTY_GRACE passed'''
+    await page.wait_for_load_state("networkidle", timeout=SELECTOR_TIMEOUT)
+    await asyncio.sleep(EMPTY_GRACE / 1000)
+
+
+async def _wait_for_selector(page, selector: str, totals: _SourceTotals):
+    '''wait for the selector, giving up early once the page has settled without it'''
+    found = asyncio.ensure_future(page.wait_for_selector(selector, state="attached", timeout=SELECTOR_TIMEOUT))
+    settled = asyncio.ensure_future(_settled(page))
+    try:
+        done, _ = await asyncio.wait({found, settled}, return_when=asyncio.FIRST_COMPLETED)
+        if found in done:
+            if found.exception() is not None:
+                totals.selector_timeouts += 1
+        elif settled.exception() is None:
+            totals.settled_without_selector += 1
+        else:
+            #networkidle never came (long polling etc.): wait out the selector timeout as before
+            try:
+                await found
+            except Exception:
+                totals.selector_timeouts += 1
+    finally:
+        for task in (found, settled):
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(found, settled, return_exceptions=True)
+
+
+async def load(page, url: str, source: str = None, wait_for_idle: bool = True, **goto_options) -> str:
+    '''navigate and return the HTML once the source's selector is present (or the network is idle)'''
+    selector = WAIT_FOR.get(source)
+    current = _current[page] = _Load()
+    totals = _totals.setdefault(source or "other", _SourceTotals())
+    started = time.perf_counter()
+    try:
+        if selector:
+            goto_options.setdefault("wait_until", "domcontentloaded")
+        await page.goto(url, **goto_options)
+        if selector:
+            await _wait_for_selector(page, selector, totals)
+        elif wait_for_idle:
+            await page.wait_for_load_state('networkidle')
+        html = await page.content()
+    finally:
+        elapsed = time.perf_counter() - started
+        if current.pending:
+            #sizes of requests that already finished; anything still in flight isn't needed
+            await asyncio.wait(list(current.pending), timeout=1)
+        _current.pop(page, None)
+        totals.pages += 1
+        totals.seconds += elapsed
+        totals.requests += current.requests
+        totals.blocked += current.blocked
+        totals.bytes += current.bytes
+        logger.info(f"{source or 'page'} {url}: {current.bytes / 1024:.0f} KB over {current.requests} request(s), "
+                    f"{current.blocked} blocked, {elapsed:.2f}s")
+    return html
+
+
+def stats() -> dict:
+    return {
+        "blocking": BLOCKING_ENABLED,
+        "blocked_resource_types": sorted(BLOCKED_RESOURCE_TYPES),
+        "sources": {source: totals.to_dict() for source, totals in _totals.items()},
+    }
@@ -0,0 +1,270 @@
+"""Pure HTML -> data parsers for the scraped pages.
+
+The scrapers only fetch; everything they extract from a page is done here,
+on selectolax's lexbor backend (a C HTML5 parser, roughly two orders of
+magnitude faster than BeautifulSoup's html.parser on these pages). Every
+function takes the page HTML and returns plain dicts/lists, touches no I/O
+and is safe to run in a worker thread or process. The output matches what the
+BeautifulSoup scrapers returned field for field;
+benchmarks/bench_parsers.py checks that against the saved fixtures. lexbor
+builds the tree by the HTML5 rules, so a table served without <tbody> still
+has one and cells with omitted end tags aren't nested into each other
+(html.parser found no rows in the first case and garbled the text in the
+second); the benchmark checks those variants too.
+"""
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from selectolax.lexbor import LexborHTMLParser
+
+#the MarketRank sections the app shows
+MARKET_BEAT_SECTIONS = [
+    "Analyst's Opinion",
+    "Earnings and Valuation",
+    "Short Interest",
+    "Dividend",
+    "Sustainability and ESG",
+    "News and Social Media",
+    "Company Ownership",
+]
+
+#fields that identify a trade row, per source (see trade_store.py)
+TRADE_KEY_FIELDS = {
+    "congress": ("name", "action", "amount", "date"),
+    "insider": ("dayFiled", "dayTraded", "insiderName", "action", "price", "quantity"),
+}
+
+
+class TradeKeys:
+    """Dedupe keys for the trade rows of one page, in page order.
+
+    A row's key is its identifying fields plus how many identical rows came
+    before it on the page, so genuinely repeated trades are kept apart.
+    """
+
+    def __init__(self, source: str):
+        self.fields = TRADE_KEY_FIELDS[source]
+        self._seen = {}
+
+    def next(self, trade: Dict) -> str:
+        base = json.dumps([trade.get(field) for field in self.fields])
+        occurrence = self._seen.get(base, 0)
+        self._seen[base] = occurrence + 1
+        return f"{base}#{occurrence}" if occurrence else base
+
+
+def trade_keys(source: str, trades: Iterable[Dict]) -> List[str]:
+    keys = TradeKeys(source)
+    return [keys.next(trade) for trade in trades]
+
+
+def calculate_delta_days(dayFiled, dayTraded):
+    """Calculate the difference in days between two dates"""
+    try:
+        if not dayFiled or not dayTraded:
+            raise ValueError(f"Missing date(s): dayFiled={dayFiled}, dayTraded={dayTraded}")
+        
+        # Normalize the date format
+        filed_date = datetime.strptime(dayFiled.split(" ")[0], "%Y-%m-%d")  # Extract only the date part
+        traded_date = datetime.strptime(dayTraded, "%Y-%m-%d")
+        delta = (filed_date - traded_date).days
+        return delta
+    except Exception as e:
+        print(f"Error calculating deltaDays: {e}")
+        return None  # Return None if dates are invalid or calculation fails
+
+
+def _text(node) -> str:
+    '''text of the node and its children, each piece stripped (BeautifulSoup's get_text(strip=True))'''
+    return node.text(strip=True)
+
+
+def _clean_text(node) -> str:
+    '''all text of the node with runs of whitespace collapsed'''
+    return ' '.join(node.text().split()).replace("\n", "").replace("\r", "").strip()
+
+
+def _text_or(node, default):
+    return _text(node) if node is not None else default
+
+
+def parse_barchart_opinion(html: str, ticker: str) -> Optional[Dict]:
+    '''the opinion summary embedded in the note button's data-symbol JSON, or None if the page has none'''
+    tree = LexborHTMLParser(html)
+    target_data = tree.css_first("div.note-button")
+    if target_data is None:
+        print("Target not found.")
+        return None
+
+    #the first <a> tag within the target div carries the data
+    a_tag = target_data.css_first("a")
+    if a_tag is None or "data-symbol" not in a_tag.attributes:
+        print("No valid <a> tag or 'data-symbol' attribute found.")
+        return None
+
+    crude_data = json.loads(a_tag.attributes["data-symbol"])
+    return {
+        "ticker": ticker,
+        "company": crude_data.get("symbolName"),
+        "lastPrice": crude_data.get("lastPrice"),
+        "percentChange": crude_data.get("percentChange"),
+        "priceChange": crude_data.get("priceChange"),
+        "opinion": crude_data.get("opinion"),
+    }
+
+
+def parse_congress_trades(html: str, ticker: str, known: Optional[set] = None) -> List[Dict]:
+    '''congress trades from a quiverquant government page (newest first); empty if there are none.
+
+    With `known` (trade_store keys), rows that are already stored are skipped. Disclosures come in
+    up to 45 days after the trade and the table isn't ordered by filing, so a new row can sit
+    below stored ones and the whole table is always read.
+    '''
+    tree = LexborHTMLParser(html)
+    keys = TradeKeys("congress")
+    main_div = tree.css_first("div.content-item.item-overview.item-gov.content-item-active")
+    rows = main_div.css("table tbody tr") if main_div is not None else []
+
+    trades = []
+    for row in rows:
+        #trade rows link to the member with an a.flex-column
+        if row.css_first("a.flex-column") is None:
+            continue
+        cells = row.css("td")
+        if len(cells) < 3:
+            continue
+        action = cells[1].css_first("span.positive")
+        if action is None:
+            action = cells[1].css_first("span.sale")
+        trade = {
+            "ticker": ticker,
+            "name": _text_or(cells[0].css_first("span"), "N/A"),
+            "action": _text_or(action, "N/A"),
+            "amount": _text_or(cells[1].css_first("span.font-12"), "N/A"),
+            "date": _text(cells[2]),
+        }
+        if known and keys.next(trade) in known:
+            continue
+        trades.append(trade)
+    return trades
+
+
+def parse_market_beat(html: str) -> Optional[Dict]:
+    '''score, label and value per MarketRank section, or None if the page has no MarketRank'''
+    tree = LexborHTMLParser(html)
+    faq_div = tree.css_first("div#marketRankAccordion")
+    if faq_div is None:
+        return None
+
+    extracted_data = {}
+    for item in faq_div.css("div.faq-item-wrapper"):
+        section = _text(item.css_first("span.mr-title"))
+        score = _text(item.css_first("span.mr-score"))
+        label = _text(item.css_first("span.mr-stat-label"))
+        value = _text(item.css_first("span.mr-stat"))
+        if section in MARKET_BEAT_SECTIONS:
+            extracted_data[section] = {
+                "score": score,
+                "label": label,
+                "value": value,
+            }
+    return extracted_data
+
+
+def parse_insider_trades(html: str, known: Optional[set] = None, stop_before: Optional[str] = None) -> List[Dict]:
+    '''rows of the openinsider screener table (newest filing first); see parse_insider_page'''
+    return parse_insider_page(html, known, stop_before)["trades"]
+
+
+def parse_insider_page(html: str, known: Optional[set] = None, stop_before: Optional[str] = None) -> Dict:
+    '''one openinsider screener page: {"trades": new rows, "rows": screener rows read, "stopped": bool}.
+
+    With `known` (trade_store keys), rows that are already stored are skipped. Late filings can
+    show up below stored ones, so parsing only stops ("stopped") at a stored row filed before
+    `stop_before` (YYYY-MM-DD), i.e. past the window that is re-read for them.
+    '''
+    tree = LexborHTMLParser(html)
+    keys = TradeKeys("insider")
+    trades = []
+    rows = 0
+    for row in tree.css("table tbody tr"):
+        cells = row.css("td")
+        #screener rows have at least 12 columns
+        if len(cells) < 12:
+            continue
+
+        day_filed = _text_or(cells[1].css_first("a"), None)
+        if day_filed is None:
+            continue
+        rows += 1
+        day_traded = _text(cells[2])
+        trade = {
+            "dayFiled": day_filed,
+            "dayTraded": day_traded,
+            "insiderName": _text_or(cells[4].css_first("a"), None),
+            "title": _text(cells[5]),
+            "action": _text(cells[6]),
+            "price": _text(cells[7]),
+            "quantity": _text(cells[8]),
+            "sharesOwned": _text(cells[9]),
+            "deltaOwn": _text(cells[10]),
+            "value": _text(cells[11]),
+            "deltaDays": None,
+        }
+        if known and keys.next(trade) in known:
+            #dates sort as text: "2024-05-24 09:15:09" < "2024-05-25"
+            if stop_before and day_filed < stop_before:
+                return {"trades": trades, "rows": rows, "stopped": True}
+            continue
+        trade["deltaDays"] = calculate_delta_days(day_filed, day_traded)
+        trades.append(trade)
+    return {"trades": trades, "rows": rows, "stopped": False}
+
+
+def parse_american_bulls_recommended(html: str) -> Optional[List[Dict]]:
+    '''the recommended stocks grid on the American Bulls front page, or None if the page has no grid'''
+    tree = LexborHTMLParser(html)
+    table = tree.css_first("table.table-hover")
+    if table is None:
+        return None
+
+    stock_data = []
+    for row in table.css("tr.gridRows"):
+        date_div = row.css_first('div[id*="Tarih"]')
+        stock_a = row.css_first("a.dxbs-hyperlink")
+        signal_div = row.css_first('div[id*="gridlevel"]')
+        buy_level_div = row.css_first('div[id*="gridprice"]')
+        close_price_div = row.css_first('div[id*="gridclose"]')
+        stock_data.append({
+            "Date": _clean_text(date_div) if date_div is not None else "N/A",
+            "Stock Name": _clean_text(stock_a) if stock_a is not None else "N/A",
+            "Signal": _clean_text(signal_div) if signal_div is not None else "N/A",
+            "Buy Level": _clean_text(buy_level_div) if buy_level_div is not None else "N/A",
+            "Close Price": _clean_text(close_price_div) if close_price_div is not None else "N/A",
+        })
+    return stock_data
+
+
+def parse_american_bulls_signal(html: str) -> Optional[List[Dict]]:
+    '''a stock's signal history on its American Bulls signal page, or None if the page has no history table'''
+    tree = LexborHTMLParser(html)
+    table = tree.css_first("table#Content_SignalHistory_SignalShortHistoryGrid_DXMainTable")
+    tbody = table.css_first("tbody") if table is not None else None
+    if tbody is None:
+        return None
+
+    table_data = []
+    for row in tbody.css("tr"):
+        cells = row.css("td")
+        if len(cells) < 5:
+            continue
+        date, price, signal, change, value = (cell.text().strip() for cell in cells[:5])
+        table_data.append({
+            "Date": date,
+            "Price": price,
+            "Signal": signal,
+            "Change%": change,
+            "Value": value,
+        })
+    return table_data
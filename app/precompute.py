@@ -0,0 +1,342 @@
+"""Scheduled market-wide precompute of watchlist tickers.
+
+Instead of analyzing and scraping per user on click, a scheduler takes the
+union of tickers across all users/{email} documents and refreshes each one
+once per cycle, writing the results to a shared tickers/{symbol} document:
+
+    symbol          the ticker
+    analysis        price, %K/%D, zone and decision (same fields as stock_analysis)
+    american_bull   latest American Bulls signal (same fields as american_bull_info)
+    scrapes         {source: {"result": ..., "updated_at": epoch seconds}} per scraper
+
+Work is O(distinct tickers) rather than O(users x tickers), and endpoints
+read these documents instead of per-user copies (see read_shared and
+read_scrapes).
+
+The cadence follows US market hours: every PRECOMPUTE_OPEN_INTERVAL seconds
+while NYSE is open, otherwise every PRECOMPUTE_CLOSED_INTERVAL seconds (or at
+the next open, whichever comes first). Exchange holidays are treated as
+trading days, which only costs a few extra cycles. Scrapes still go through
+the scrape cache, so each source is re-scraped no more often than its TTL, and
+a cached result keeps the time it was actually fetched as its updated_at.
+American Bulls signals only change once a day, so a ticker's signal is
+re-fetched once per session, PRECOMPUTE_BULLS_DELAY seconds after the close.
+
+Runs inside the API process when PRECOMPUTE_IN_PROCESS=1, or on its own with
+``python precompute.py``.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import indicators
+import ohlc_store
+import scrapers
+from cache import is_cacheable, scrape_cache, ttl_for
+from firestore_writes import commit_writes
+from workers import cpu_workers
+
+logger = logging.getLogger("precompute")
+
+TICKERS_COLLECTION = "tickers"
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = (9, 30)
+MARKET_CLOSE = (16, 0)
+
+OPEN_INTERVAL = float(os.getenv("PRECOMPUTE_OPEN_INTERVAL", "300"))
+CLOSED_INTERVAL = float(os.getenv("PRECOMPUTE_CLOSED_INTERVAL", "3600"))
+IN_PROCESS = os.getenv("PRECOMPUTE_IN_PROCESS", "0") == "1"
+#American Bulls publishes the day's signals after the close; fetch them this long after it
+BULLS_DELAY = float(os.getenv("PRECOMPUTE_BULLS_DELAY", "3600"))
+
+#scrape cache source name -> list-level scraper
+SCRAPERS = {
+    "congress": scrapers.scrape_congress_trades,
+    "market_beat": scrapers.scrape_market_beat,
+    "insider": scrapers.scrape_insider_trades,
+    "barchart": scrapers.scrape_barchart_opinions,
+}
+
+
+def market_open(now: Optional[datetime] = None) -> bool:
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= (now.hour, now.minute) < MARKET_CLOSE
+
+
+def seconds_until_open(now: Optional[datetime] = None) -> float:
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    opening = now.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    if opening <= now:
+        opening += timedelta(days=1)
+    while opening.weekday() >= 5:
+        opening += timedelta(days=1)
+    return (opening - now).total_seconds()
+
+
+def last_close(now: Optional[datetime] = None) -> datetime:
+    '''the most recent weekday close at or before now'''
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    close = now.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0, microsecond=0)
+    if close > now:
+        close -= timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= timedelta(days=1)
+    return close
+
+
+def bulls_due(fetched_at: Optional[float], now: Optional[datetime] = None, delay: float = BULLS_DELAY) -> bool:
+    '''whether a signal fetched at `fetched_at` (epoch seconds) predates the latest published one'''
+    if fetched_at is None:
+        return True
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    published = last_close(now - timedelta(seconds=delay)) + timedelta(seconds=delay)
+    return fetched_at < published.timestamp()
+
+
+def next_interval(now: Optional[datetime] = None,
+                  open_interval: float = OPEN_INTERVAL, closed_interval: float = CLOSED_INTERVAL) -> float:
+    '''seconds to wait before the next cycle'''
+    if market_open(now):
+        return open_interval
+    return min(closed_interval, seconds_until_open(now))
+
+
+def ticker_ref(db, symbol: str):
+    return db.collection(TICKERS_COLLECTION).document(symbol.upper())
+
+
+def watched_tickers(db) -> List[str]:
+    '''union of every user's watchlist'''
+    tickers = set()
+    for doc in db.collection("users").select(["stocks"]).stream():
+        tickers.update(stock.upper() for stock in (doc.to_dict() or {}).get("stocks", []) if stock)
+    return sorted(tickers)
+
+
+def _latest_bars(symbols: List[str]) -> Dict:
+    ohlc_store.store.refresh(symbols)
+    return ohlc_store.store.tail(symbols, bars=indicators.window_bars())
+
+
+async def analyze_symbols(symbols: List[str]) -> Dict[str, dict]:
+    '''stock_analysis records for every symbol with price data, from one batched refresh of the OHLC store'''
+    #downloads and SQLite reads run in a thread, the stochastic panel in the worker pool
+    ohlc = await asyncio.to_thread(_latest_bars, symbols)
+    stochastics = await cpu_workers.run(indicators.watchlist_records, ohlc)
+
+    analysis = {}
+    for symbol, data in ohlc.items():
+        if data.empty or symbol not in stochastics:
+            continue
+        stochastic = stochastics[symbol]
+        analysis[symbol] = {
+            "Stock Name": symbol,
+            "Price": float(data["Close"].iloc[-1]),
+            "%K": stochastic["%K"],
+            "%D": stochastic["%D"],
+            "Zone": stochastic["Zone"],
+            "Decision": stochastic["Decision"],
+            "Last Updated": datetime.utcnow(),
+        }
+    return analysis
+
+
+async def american_bull_record(symbol: str) -> dict:
+    '''american_bull_info record for the latest American Bulls signal'''
+    american_bull_data = await scrapers.specific_stock(symbol)
+    latest_bull = american_bull_data[0] if american_bull_data else {}
+    return {
+        "Stock Name": symbol,
+        "Signal": latest_bull.get("Signal", "N/A"),
+        "Date": latest_bull.get("Date", "N/A"),
+        "Price": latest_bull.get("Price", "N/A"),
+        "Change%": latest_bull.get("Change%", "N/A"),
+        "Value": latest_bull.get("Value", "N/A"),
+        "Last Updated": datetime.utcnow(),
+    }
+
+
+def has_signal(record: dict) -> bool:
+    '''False for the all-"N/A" record of a failed American Bulls fetch, which mustn't replace a stored one'''
+    return record.get("Signal", "N/A") != "N/A"
+
+
+#per-user analysis subcollections used before tickers/{symbol}; nothing reads them any more
+LEGACY_COLLECTIONS = ("stock_analysis", "american_bull_info")
+
+
+def legacy_deletes(user_ref, symbols: Optional[List[str]] = None) -> List[tuple]:
+    '''commit_writes deletes for a user's legacy analysis documents: all of them, or just these symbols'''
+    if symbols is not None:
+        return [("delete", user_ref.collection(name).document(symbol), None)
+                for name in LEGACY_COLLECTIONS for symbol in symbols]
+    return [("delete", ref, None)
+            for name in LEGACY_COLLECTIONS for ref in user_ref.collection(name).list_documents()]
+
+
+def read_shared(db, symbols: List[str], field: str) -> List[dict]:
+    '''one field ("analysis", "american_bull") of each symbol's shared document, in watchlist order,
+    fetched with a single batched get; symbols without it yet are left out'''
+    refs = [ticker_ref(db, symbol) for symbol in dict.fromkeys(s.upper() for s in symbols)]
+    if not refs:
+        return []
+    found = {}
+    for snapshot in db.get_all(refs, field_paths=[field]):
+        value = (snapshot.to_dict() or {}).get(field) if snapshot.exists else None
+        if value:
+            found[snapshot.id] = value
+    return [found[ref.id] for ref in refs if ref.id in found]
+
+
+def read_scrapes(db, symbols: List[str], source: str) -> Dict[str, object]:
+    '''precomputed results for one scrape source that are still within its cache TTL, by symbol'''
+    refs = [ticker_ref(db, symbol) for symbol in dict.fromkeys(s.upper() for s in symbols)]
+    if not refs:
+        return {}
+    cutoff = time.time() - ttl_for(source)
+    shared = {}
+    for snapshot in db.get_all(refs, field_paths=[f"scrapes.{source}"]):
+        if not snapshot.exists:
+            continue
+        entry = ((snapshot.to_dict() or {}).get("scrapes") or {}).get(source)
+        if entry and entry.get("updated_at", 0) >= cutoff:
+            shared[snapshot.id] = entry["result"]
+    return shared
+
+
+class Precomputer:
+    def __init__(self, db, open_interval: float = OPEN_INTERVAL, closed_interval: float = CLOSED_INTERVAL):
+        self.db = db
+        self.open_interval = open_interval
+        self.closed_interval = closed_interval
+        self._task: Optional[asyncio.Task] = None
+        self.cycles = 0
+        self.failed_cycles = 0
+        self.tickers = 0
+        self.failed_writes = 0
+        self.last_started_at = None
+        self.last_finished_at = None
+        self.last_seconds = None
+        #symbol -> when its American Bulls signal was last fetched successfully
+        self._bulls_fetched_at: Dict[str, float] = {}
+
+    async def run_once(self) -> dict:
+        '''refresh every watched ticker once and write the shared documents'''
+        started = time.perf_counter()
+        self.last_started_at = time.time()
+        tickers = await asyncio.to_thread(watched_tickers, self.db)
+        self.tickers = len(tickers)
+        if not tickers:
+            return {"tickers": 0}
+
+        async def american_bulls():
+            due = [symbol for symbol in tickers if bulls_due(self._bulls_fetched_at.get(symbol))]
+            records = await asyncio.gather(*(american_bull_record(symbol) for symbol in due))
+            return dict(zip(due, records))
+
+        async def fetch_times(source):
+            #results served from the scrape cache keep the time they were really scraped
+            return await asyncio.gather(*(scrape_cache.fetched_at(source, symbol) for symbol in tickers))
+
+        #prices are analyzed while American Bulls and the scrapers fetch concurrently
+        sources = list(SCRAPERS)
+        analysis, bulls, *scraped = await asyncio.gather(
+            analyze_symbols(tickers),
+            american_bulls(),
+            *(SCRAPERS[source](tickers) for source in sources),
+        )
+        fetched = await asyncio.gather(*(fetch_times(source) for source in sources))
+
+        now = time.time()
+        writes = []
+        for position, symbol in enumerate(tickers):
+            #a merge replaces every field it's given, so failed fetches are left out rather than written
+            doc = {"symbol": symbol}
+            if symbol in analysis:
+                doc["analysis"] = analysis[symbol]
+            if symbol in bulls and has_signal(bulls[symbol]):
+                doc["american_bull"] = bulls[symbol]
+            scrapes = {}
+            for source, results, times in zip(sources, scraped, fetched):
+                result = results[position]
+                #errors, empty results and "No data found" pages, as the scrape cache judges them
+                if is_cacheable(result):
+                    scrapes[source] = {"result": result, "updated_at": times[position] or now}
+            if scrapes:
+                doc["scrapes"] = scrapes
+            writes.append(("merge", ticker_ref(self.db, symbol), doc))
+
+        failed = await asyncio.to_thread(commit_writes, self.db, writes)
+        failed_symbols = {ref.id for _, ref, _ in failed}
+        #forget tickers nobody watches any more; signals that didn't get written are fetched again
+        self._bulls_fetched_at = {symbol: at for symbol, at in self._bulls_fetched_at.items() if symbol in tickers}
+        for symbol, record in bulls.items():
+            if has_signal(record) and symbol not in failed_symbols:
+                self._bulls_fetched_at[symbol] = self.last_started_at
+        self.failed_writes += len(failed)
+        self.cycles += 1
+        self.last_finished_at = time.time()
+        self.last_seconds = round(time.perf_counter() - started, 3)
+        logger.info(f"Precomputed {len(tickers)} ticker(s) in {self.last_seconds}s ({len(failed)} failed write(s))")
+        return {"tickers": len(tickers), "failed_writes": len(failed)}
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed_cycles += 1
+                logger.error(f"Precompute cycle failed: {e}")
+            await asyncio.sleep(next_interval(None, self.open_interval, self.closed_interval))
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info("Precompute scheduler started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_forever(self):
+        await self.start()
+        await self._task
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "market_open": market_open(),
+            "tickers": self.tickers,
+            "cycles": self.cycles,
+            "failed_cycles": self.failed_cycles,
+            "failed_writes": self.failed_writes,
+            "last_started_at": self.last_started_at,
+            "last_finished_at": self.last_finished_at,
+            "last_seconds": self.last_seconds,
+        }
+
+
+if __name__ == "__main__":
+    #standalone worker: same service account as the API
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+    from browser_pool import pool
+    from http_client import http
+
+    logging.basicConfig(level=logging.INFO)
+    firebase_admin.initialize_app(credentials.Certificate(
+        os.path.join(os.path.dirname(__file__), "serviceAccountKey.json")))
+
+    async def main():
+        async with pool, http, cpu_workers:
+            await Precomputer(firestore.client()).run_forever()
+
+    asyncio.run(main())
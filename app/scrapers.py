@@ -1,13 +1,24 @@
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright 
-from playwright.async_api import Playwright, async_playwright
 from playwright_stealth import stealth_async
+from browser_pool import pool
+import throttle
+import page_loads
+import http_client
+from cache import NoData, scrape_cache
+import trade_store
+from workers import cpu_workers
+import parsers
 import asyncio
+from contextlib import AsyncExitStack
 from dateutil import parser
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import random
 import os
+import tempfile
+from typing import List, Dict
+
+#cookies and other session data shared by the scrapers' browser contexts
+SESSION_FILE = "browser-session.json"
 
 def get_random_user_agent(file_path="user-agents.json"):
     """Loads user agents from a JSON file and returns a random user agent"""
@@ -15,22 +26,216 @@ def get_random_user_agent(file_path="user-agents.json"):
         user_agents = json.load(file)
     return random.choice(user_agents)
 
-def calculate_delta_days(dayFiled, dayTraded):
-    """Calculate the difference in days between two dates"""
+def session_context_options(**extra) -> dict:
+    """Browser context options with a random user agent and viewport, reusing the saved session if there is one"""
+    #vary the browser context so that the user agent is randomized or rotated
+    options = {
+        "user_agent": get_random_user_agent(),
+        "viewport": {"width": random.randint(800, 1920), "height": random.randint(400, 1080)},
+    }
+    #retain and reuse session cookies so subsequent requests look more like a regular user session
+    if os.path.exists(SESSION_FILE):
+        options["storage_state"] = SESSION_FILE
+    options.update(extra)
+    return options
+
+def save_session(state: dict):
+    """Writes the session file atomically: concurrent workers each write a temp file and swap it in,
+    so a new context never reads a half-written session"""
+    directory = os.path.dirname(os.path.abspath(SESSION_FILE))
+    with tempfile.NamedTemporaryFile("w", dir=directory, prefix=".browser-session-", suffix=".tmp", delete=False) as file:
+        try:
+            json.dump(state, file)
+        except Exception:
+            file.close()
+            os.remove(file.name)
+            raise
+    os.replace(file.name, SESSION_FILE)
+
+async def parse(parse_page, html, *args):
+    """Runs one of the parsers in the worker pool so other requests keep being served while a page is parsed"""
+    return await cpu_workers.run(parse_page, html, *args)
+
+#how each source is fetched: "http" (plain GET through the shared client, falling back to the browser
+#when the expected markup is missing) or "browser" (Playwright); override with SCRAPE_<SOURCE>_FETCHER.
+#"http" is only honoured for sources listed in EXPECTED_MARKUP
+FETCHERS = {
+    "congress": "browser",      #quiverquant renders the trades table client-side
+    "market_beat": "browser",
+    "insider": "http",          #openinsider's screener is server-rendered
+    "barchart": "browser",
+}
+
+#markup an HTTP response must contain to be used as-is; otherwise the page is loaded in the browser.
+#without it a block or captcha page would be parsed as an empty result, so congress (rendered
+#client-side, nothing to check for in the raw HTML) always uses the browser
+EXPECTED_MARKUP = {
+    "insider": "tinytable",
+    "market_beat": "marketRankAccordion",
+    "barchart": "note-button",
+}
+
+#markup of a real page from the site even when it has no data for the ticker; an empty result from such a
+#page is cached briefly (cache.NoData), while one from a block or error page is retried on the next request
+SITE_MARKUP = {
+    "congress": "item-gov",                     #quiverquant's government tab, present with or without trades
+    "market_beat": 'content="MarketBeat"',      #og:site_name of MarketBeat's own pages
+}
+
+def no_data(source: str, html: str, result: dict) -> dict:
+    """An empty result, marked as a real empty page when the html is the site's own"""
+    marker = SITE_MARKUP.get(source)
+    return NoData(result) if marker and marker in html else result
+
+#fetches and fallbacks per source, exposed through fetcher_stats()
+_fetch_counts = {}
+#sources whose SCRAPE_<SOURCE>_FETCHER=http was ignored (warned about once)
+_refused_http = set()
+
+def _count(source: str, key: str):
+    counts = _fetch_counts.setdefault(source, {"http": 0, "browser": 0, "fallbacks": 0})
+    counts[key] += 1
+
+def fetcher_stats() -> dict:
+    return {source: {"backend": fetcher_for(source), **counts} for source, counts in _fetch_counts.items()}
+
+def fetcher_for(source: str) -> str:
+    fetcher = os.getenv(f"SCRAPE_{source.upper()}_FETCHER", FETCHERS.get(source, "browser"))
+    if fetcher == "http" and source not in EXPECTED_MARKUP:
+        if source not in _refused_http:
+            _refused_http.add(source)
+            print(f"No expected markup for {source}, ignoring the http fetcher and using the browser")
+        return "browser"
+    return fetcher
+
+class BrowserFetcher:
+    """Loads pages in Playwright, leasing a pooled page on the first fetch and keeping it for the rest"""
+
+    def __init__(self, stack: AsyncExitStack, setup_page=None, **context_options):
+        self.stack = stack
+        self.setup_page = setup_page
+        self.context_options = context_options
+        self.page = None
+
+    async def _lease(self):
+        if self.page is None:
+            leased = await self.stack.enter_async_context(pool.page(**session_context_options(**self.context_options)))
+            #skip images, fonts, ads and trackers; only the HTML is parsed
+            await page_loads.install(leased)
+            if self.setup_page:
+                await self.setup_page(leased)
+            self.page = leased
+        return self.page
+
+    async def fetch(self, url: str, source: str, limiter, wait_for_idle: bool = True, **goto_options) -> str:
+        """Loads a url within the host's concurrency and rate limits, waiting only for the selector the source
+        parses (see page_loads.WAIT_FOR) or network idle"""
+        page = await self._lease()
+        async with limiter:
+            _count(source, "browser")
+            return await page_loads.load(page, url, source, wait_for_idle, **goto_options)
+
+    async def close(self):
+        if self.page is not None:
+            try:
+                #save the session state for future use
+                state = await self.page.context.storage_state()
+                await asyncio.to_thread(save_session, state)
+            except Exception as e:
+                print(f"ERROR saving browser session: {str(e)}")
+
+class HttpFetcher:
+    """Plain GETs through the shared pooled client (keep-alive, gzip); falls back to the browser
+    when the response doesn't contain `expect`"""
+
+    def __init__(self, fallback: BrowserFetcher, expect: str):
+        self.fallback = fallback
+        self.expect = expect
+        self.headers = {"User-Agent": get_random_user_agent()}
+
+    async def fetch(self, url: str, source: str, limiter, **browser_options) -> str:
+        try:
+            async with limiter:
+                _count(source, "http")
+                response = await http_client.http.get(url, headers=self.headers)
+            html = response.text
+            if self.expect in html:
+                return html
+            print(f"Expected markup missing from {url}, loading it in the browser")
+        except Exception as e:
+            print(f"ERROR fetching {url} over HTTP, loading it in the browser: {str(e)}")
+        _count(source, "fallbacks")
+        return await self.fallback.fetch(url, source, limiter, **browser_options)
+
+    async def close(self):
+        await self.fallback.close()
+
+def make_fetcher(source: str, stack: AsyncExitStack, setup_page=None, **context_options):
+    """The fetcher configured for a source; browser pages are only leased once actually needed"""
+    browser = BrowserFetcher(stack, setup_page, **context_options)
+    if fetcher_for(source) == "http":
+        return HttpFetcher(browser, EXPECTED_MARKUP[source])
+    return browser
+
+async def stream_with_pages(source: str, stocks: list, scrape_ticker, concurrency: int = None,
+                            setup_page=None, **context_options):
+    """Fans tickers out over several concurrent workers and yields (index, ticker, result) as each ticker finishes.
+
+    Each worker fetches through the source's fetcher (see FETCHERS): plain HTTP where the page is
+    server-rendered, a pooled browser page otherwise. The number of workers comes from the source's
+    limits in throttle.py unless `concurrency` is given (1 scrapes sequentially), and every fetch goes
+    through the host limiter so concurrent calls share one request budget per site. Results go through
+    the shared scrape cache, so tickers cached (or being fetched) for another user don't cost a fetch,
+    and a worker only leases a browser page once it actually needs one. Finished results wait in a queue
+    no longer than the number of workers, so a slow consumer holds the workers back instead of piling up
+    results in memory. Closing the generator early cancels the remaining work and releases the pages.
+    """
+    concurrency = min(concurrency or throttle.limits(source).concurrency, len(stocks))
+    if not concurrency:
+        return
+    limiter = throttle.host_limiter(source)
+    finished = asyncio.Queue(maxsize=concurrency)
+    #workers pull (index, ticker) pairs from one shared iterator so each ticker is handled once
+    pending = iter(enumerate(stocks))
+
+    async def worker():
+        async with AsyncExitStack() as stack:
+            fetcher = make_fetcher(source, stack, setup_page, **context_options)
+
+            for index, ticker in pending:
+                try:
+                    result = await scrape_cache.get_or_fetch(source, ticker,
+                                                             lambda: scrape_ticker(fetcher, ticker, limiter))
+                except Exception as e:
+                    #a failed fetch or parse on one ticker shouldn't take the others down with it
+                    print(f"ERROR scraping {source} data for {ticker} due to {str(e)}")
+                    result = {"ERROR": f"Could not fetch data for {ticker} due to {str(e)}"}
+                await finished.put((index, ticker, result))
+
+            await fetcher.close()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
     try:
-        if not dayFiled or not dayTraded:
-            raise ValueError(f"Missing date(s): dayFiled={dayFiled}, dayTraded={dayTraded}")
-        
-        # Normalize the date format
-        filed_date = datetime.strptime(dayFiled.split(" ")[0], "%Y-%m-%d")  # Extract only the date part
-        traded_date = datetime.strptime(dayTraded, "%Y-%m-%d")
-        delta = (filed_date - traded_date).days
-        return delta
-    except Exception as e:
-        print(f"Error calculating deltaDays: {e}")
-        return None  # Return None if dates are invalid or calculation fails
-
-def scrape_barchart_opinion(ticker : str) -> dict:
+        for _ in range(len(stocks)):
+            yield await finished.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+async def scrape_with_pages(source: str, stocks: list, scrape_ticker, concurrency: int = None,
+                            setup_page=None, **context_options) -> list:
+    """stream_with_pages collected into one result per ticker, in input order."""
+    results = [None] * len(stocks)
+    async for index, _, result in stream_with_pages(source, stocks, scrape_ticker, concurrency,
+                                                    setup_page, **context_options):
+        results[index] = result
+    return results
+
+#set real browser User-Agent to evade attempts at blocking bots
+BARCHART_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+async def scrape_barchart_ticker(fetcher, ticker: str, limiter) -> dict:
     '''fetches stock info from barchart based on the ticker entered by user'''
     #mark current data
     date = datetime.now().strftime("%B %d, %Y")
@@ -38,334 +243,169 @@ def scrape_barchart_opinion(ticker : str) -> dict:
     #construct url
     url = f"https://www.barchart.com/stocks/quotes/{ticker}/opinion"
 
-    #set real browser User-Agent to evade attempts at blocking bots
-    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    #get data of stock from barchart
+    try:
+        #navigate to the url with a timeout and wait until domcontentloaded
+        html = await fetcher.fetch(url, "barchart", limiter, wait_for_idle=False, timeout=60000, wait_until="domcontentloaded")
+    except Exception as e:
+        #handle exceptions and print an error message
+        print(f"Error fetching data: {e}")
+        return {}
 
-    with sync_playwright() as p:
-        #start browser
-        browser = p.chromium.launch(headless=True) 
-        #create browser context with User-Agent and viewport to mimic real users
-        context = browser.new_context(user_agent=USER_AGENT, viewport={"width": 1280, "height": 720})  
-        #open a new page
-        page = context.new_page()
+    #parse the opinion out of the page
+    clean_data = await parse(parsers.parse_barchart_opinion, html, ticker)
 
-        #get data of stock from barchart
-        try:
-            #navigate to the url with a timeout and wait until domcontentloaded
-            page.goto(url, timeout=60000, wait_until="domcontentloaded")
-            #wait 5 seconds for content to settle
-            #page.wait_for_timeout(5000)          #works for now, uncomment if needed
-            #get the full page content
-            html = page.content()
-        except Exception as e:
-            #handle exceptions and print an error message
-            print(f"Error fetching data: {e}")
-            html = None
-        finally:
-            #close the browser
-            browser.close()
-
-    #if data could not be fetched, set flag accordingly
-    if html == None:
-        success = False #flag 
-
-    #parse and find data target
-    soup = BeautifulSoup(html, "html.parser") #parse html content
-    target_data = soup.find("div", {"class": "note-button"}) #find the target div by class name
-
-    #extract the data
-    if target_data:
-        #find the first <a> tag within the target div
-        a_tag = target_data.find("a")
-        if a_tag and a_tag.has_attr("data-symbol"):
-            #parse the JSON-like string in data-symbol
-            data_symbol = a_tag["data-symbol"]
-            crude_data = json.loads(data_symbol) #convert JSON string to a Python dictionary
-
-            #extract required fields into variables
-            company = crude_data.get("symbolName")
-            lastPrice = crude_data.get("lastPrice")
-            percentChange = crude_data.get("percentChange")
-            priceChange = crude_data.get("priceChange")
-            opinion = crude_data.get("opinion")
-
-            #store the extracted data in a dictionary
-            clean_data = {
-                "ticker" : ticker,
-                "company": company,
-                "lastPrice": lastPrice,
-                "percentChange": percentChange,
-                "priceChange": priceChange,
-                "opinion": opinion,
-                "date" : date}
-
-            #set flag
-            success = True
-        else:
-            #handle case where <a> tag or data-symbol attribute is missing
-            print("No valid <a> tag or 'data-symbol' attribute found.")
-            success = False
-    else:
-        #handle case where target div is not found
-        print("Target not found.")
-        success = False
-    
     #if process fails, return empty dictionary
-    if success:
-        return clean_data
-    else:
+    if clean_data is None:
         return {}
-    
-async def scrape_congress_trades(stocks: list) -> list:
-    '''Fetches congress trading data from quiverquant.com based on the ticker entered by user'''
-    #vary the browser context so that the user agent is randomized or rotated
-    chosen_user_agent = get_random_user_agent()
-
-    #initialize playwright
-    playwright: Playwright = await async_playwright().start()  # Start Playwright explicitly
-    browser = await playwright.chromium.launch(headless=True)  # Launch the browser
-
-    #add in ways to retain and reuse session cookies so subsequent requests look more like a regular user session
-    #use storage_state to store/reuse cookies and other session data.
-    #if "browser-session.json" exists, use it. if not, a new session context is created.
-    if os.path.exists("browser-session.json"):
-        context = await browser.new_context(
-            user_agent=chosen_user_agent,
-            storage_state="browser-session.json",  #load existing session state
-            viewport={"width": random.randint(800, 1920), "height": random.randint(400, 1080)}
-        )
+    clean_data["date"] = date
+    return clean_data
+
+async def scrape_barchart_opinions(stocks: list, concurrency: int = None) -> list:
+    '''fetches barchart opinions for all tickers concurrently, in input order'''
+    #fixed User-Agent and viewport to mimic real users
+    return await scrape_with_pages("barchart", stocks, scrape_barchart_ticker, concurrency,
+                                   user_agent=BARCHART_USER_AGENT, viewport={"width": 1280, "height": 720})
+
+async def scrape_congress_ticker(fetcher, ticker: str, limiter):
+    """Fetches and parses congress trades for one ticker"""
+    #construct url
+    url = f"https://www.quiverquant.com/stock/{ticker}/government/"
+
+    #every stored trade: the page isn't ordered by filing, so any row can be new
+    known = await asyncio.to_thread(trade_store.store.known_keys, "congress", ticker, None)
+
+    #handle errors better
+    try:
+        html = await fetcher.fetch(url, "congress", limiter)
+    except Exception as e:
+        #log the error and continue to the next ticker
+        print(f"ERROR visiting {url} for {ticker} due to {str(e)}")
+        return {"ERROR": f"Could not fetch data for {ticker} due to {str(e)}"}
+
+    #parse the html for new trades and serve the ticker's history from the store
+    new_trades = await parse(parsers.parse_congress_trades, html, ticker, known)
+    await asyncio.to_thread(trade_store.store.append, "congress", ticker, new_trades)
+    trades = await asyncio.to_thread(trade_store.store.trades, "congress", ticker)
+
+    if trades:
+        return trades
     else:
-        context = await browser.new_context(
-            user_agent=chosen_user_agent,
-            viewport={"width": random.randint(800, 1920), "height": random.randint(400, 1080)}
-        )
+        return no_data("congress", html, {"ERROR": f"No data found for {ticker}."})
 
-    page = await context.new_page()
+async def scrape_congress_trades(stocks: list, concurrency: int = None) -> list:
+    '''Fetches congress trading data from quiverquant.com based on the ticker entered by user'''
+    return await scrape_with_pages("congress", stocks, scrape_congress_ticker, concurrency)
 
-    allData = []
-    for ticker in stocks:
-        #construct url
-        url = f"https://www.quiverquant.com/stock/{ticker}/government/"
+def stream_congress_trades(stocks: list, concurrency: int = None):
+    '''scrape_congress_trades, yielding (index, ticker, result) as each ticker finishes'''
+    return stream_with_pages("congress", stocks, scrape_congress_ticker, concurrency)
 
-        #handle errors better
-        try:
-            await page.goto(url)
-            await page.wait_for_load_state('networkidle')
-            await asyncio.sleep(random.uniform(2, 6))  #adjust this if needed
-            html = await page.content()
-        except Exception as e:
-            #log the error and continue to the next ticker
-            print(f"ERROR visiting {url} for {ticker} due to {str(e)}")
-            allData.append({"ERROR": f"Could not fetch data for {ticker} due to {str(e)}"})
-            continue
-
-        #parse the html for target data
-        soup = BeautifulSoup(html, "html.parser")
-        main_div = soup.select_one("div.content-item.item-overview.item-gov.content-item-active")
-        if main_div:
-            rows = main_div.select("table tbody tr")
-        else:
-            rows = []
-
-        #holds trade data for one stock
-        trades = []
-
-        #loop through all rows and extract data
-        for row in rows:
-            #check if this is a valid trade row by looking for the flex-column class
-            if row.select_one("a.flex-column"):
-                cells = row.find_all("td")
-                if len(cells) >= 3:
-                    name = cells[0].find("span").get_text(strip=True) if cells[0].find("span") else "N/A"
-                    action = cells[1].find("span", class_="positive") or cells[1].find("span", class_="sale")
-                    action = action.get_text(strip=True) if action else "N/A"
-                    amount_span = cells[1].find("span", class_="font-12")
-                    amount = amount_span.get_text(strip=True) if amount_span else "N/A"
-                    date = cells[2].get_text(strip=True)
-
-                    trades.append({
-                        "ticker": ticker,
-                        "name": name,
-                        "action": action,
-                        "amount": amount,
-                        "date": date
-                    })
-
-        if trades:
-            allData.append(trades)
-        else:
-            allData.append({"ERROR": f"No data found for {ticker}."})
-
-    #save the session state for future use
-    await context.storage_state(path="browser-session.json")
-
-    #clean up browser and playwright instances
-    await browser.close()
-    await playwright.stop()
-    return allData
-
-async def scrape_market_beat(stocks: list) -> list:
-    """Fetches stock data from the specified website based on the ticker entered by user"""
-    # Get a random user agent
-    chosen_user_agent = get_random_user_agent()
-
-    playwright: Playwright = await async_playwright().start()
-    browser = await playwright.chromium.launch(headless=True)
-
-    if os.path.exists("browser-session.json"):
-        context = await browser.new_context(
-            user_agent=chosen_user_agent,
-            storage_state="browser-session.json",
-            viewport={"width": random.randint(800, 1920), "height": random.randint(400, 1080)}
-        )
+async def scrape_market_beat_ticker(fetcher, ticker: str, limiter):
+    """Fetches and parses the MarketBeat MarketRank sections for one ticker"""
+    url = f"https://www.marketbeat.com/stocks/NASDAQ/{ticker}/"
+    try:
+        html = await fetcher.fetch(url, "market_beat", limiter)
+    except Exception as e:
+        return {"ERROR": f"Could not fetch data for {ticker} due to {str(e)}"}
+
+    extracted_data = await parse(parsers.parse_market_beat, html)
+    if extracted_data is not None:
+        return {ticker: extracted_data}
     else:
-        context = await browser.new_context(
-            user_agent=chosen_user_agent,
-            viewport={"width": random.randint(800, 1920), "height": random.randint(400, 1080)}
-        )
-    
-    page = await context.new_page()
-    all_data = []
+        return no_data("market_beat", html, {ticker: "No data found"})
 
-    for ticker in stocks:
-        url = f"https://www.marketbeat.com/stocks/NASDAQ/{ticker}/"
+async def scrape_market_beat(stocks: list, concurrency: int = None) -> list:
+    """Fetches stock data from the specified website based on the ticker entered by user"""
+    return await scrape_with_pages("market_beat", stocks, scrape_market_beat_ticker, concurrency)
+
+def stream_market_beat(stocks: list, concurrency: int = None):
+    '''scrape_market_beat, yielding (index, ticker, result) as each ticker finishes'''
+    return stream_with_pages("market_beat", stocks, scrape_market_beat_ticker, concurrency)
+
+INSIDER_URL = "http://openinsider.com/screener?s={ticker}&o=&pl=&ph=&ll=&lh=&fd={days}&fdr=&td=0&tdr=&fdlyl=&fdlyh=&daysago=&xp=1&xs=1&vl=&vh=&ocl=&och=&sic1=-1&sicl=100&sich=9999&grp=0&nfl=&nfh=&nil=&nih=&nol=&noh=&v2l=&v2h=&oc2l=&oc2h=&sortcol=0&cnt={rows}&page={page}"
+INSIDER_HISTORY_DAYS = 730
+INSIDER_ROWS_PER_PAGE = 200
+#pages followed when more new filings than one page came in since the last scrape
+INSIDER_MAX_PAGES = int(os.getenv("INSIDER_MAX_PAGES", "5"))
+#days re-read before the newest stored filing, for filings that show up late; stored rows in this
+#window are skipped rather than ending the parse
+INSIDER_OVERLAP_DAYS = 7
+
+def insider_window(newest):
+    """How far back to ask openinsider for (days) and the filing date the re-read window starts at:
+    the days since the newest stored filing plus the overlap, or the full history with no window"""
+    try:
+        filed = datetime.strptime(newest["dayFiled"].split(" ")[0], "%Y-%m-%d")
+    except Exception:
+        return INSIDER_HISTORY_DAYS, None
+    days = max(1, min((datetime.now() - filed).days + INSIDER_OVERLAP_DAYS, INSIDER_HISTORY_DAYS))
+    return days, (filed - timedelta(days=INSIDER_OVERLAP_DAYS)).strftime("%Y-%m-%d")
+
+async def scrape_insider_ticker(fetcher, ticker: str, limiter):
+    """Fetches and parses the openinsider screener table for one ticker"""
+    #only filings newer than what's stored are fetched and parsed
+    known = await asyncio.to_thread(trade_store.store.known_keys, "insider", ticker)
+    newest = await asyncio.to_thread(trade_store.store.newest, "insider", ticker)
+    days, stop_before = insider_window(newest)
+
+    new_trades = []
+    #a first scrape reads one page of history, like before; later ones follow full pages until stored rows
+    #older than the re-read window
+    for page in range(1, (INSIDER_MAX_PAGES if known else 1) + 1):
+        url = INSIDER_URL.format(ticker=ticker, days=days, rows=INSIDER_ROWS_PER_PAGE, page=page)
         try:
-            await page.goto(url)
-            await page.wait_for_load_state('networkidle')
-            await asyncio.sleep(random.uniform(2, 6))
-            html = await page.content()
+            html = await fetcher.fetch(url, "insider", limiter)
         except Exception as e:
-            all_data.append({"ERROR": f"Could not fetch data for {ticker} due to {str(e)}"})
-            continue
-
-        soup = BeautifulSoup(html, "html.parser")
-        faq_div = soup.select_one("div#marketRankAccordion")
-
-        if faq_div:
-            extracted_data = {}
-            items = faq_div.select("div.faq-item-wrapper")
-
-            for item in items:
-                section = item.select_one("span.mr-title").get_text(strip=True)
-                score = item.select_one("span.mr-score").get_text(strip=True)
-                label = item.select_one("span.mr-stat-label").get_text(strip=True)
-                value = item.select_one("span.mr-stat").get_text(strip=True)
-
-                if section in [
-                    "Analyst's Opinion",
-                    "Earnings and Valuation",
-                    "Short Interest",
-                    "Dividend",
-                    "Sustainability and ESG",
-                    "News and Social Media",
-                    "Company Ownership",
-                ]:
-                    extracted_data[section] = {
-                        "score": score,
-                        "label": label,
-                        "value": value,
-                    }
-
-            all_data.append({ticker: extracted_data})
-        else:
-            all_data.append({ticker: "No data found"})
-
-    await context.storage_state(path="browser-session.json")
-    await browser.close()
-    await playwright.stop()
-    return all_data
-
-async def scrape_insider_trades(stocks: list) -> list:
+            if page == 1:
+                return {"ERROR": f"Could not fetch data for {ticker} due to {str(e)}"}
+            break
+        parsed = await parse(parsers.parse_insider_page, html, known, stop_before)
+        new_trades += parsed["trades"]
+        #a short page is the end of the results
+        if parsed["stopped"] or parsed["rows"] < INSIDER_ROWS_PER_PAGE:
+            break
+
+    await asyncio.to_thread(trade_store.store.append, "insider", ticker, new_trades)
+    trades = await asyncio.to_thread(trade_store.store.trades, "insider", ticker, None, INSIDER_ROWS_PER_PAGE)
+    return {ticker: trades}
+
+async def scrape_insider_trades(stocks: list, concurrency: int = None) -> list:
     """Fetches stock data from the specified website based on the ticker entered by user"""
-    # Get a random user agent
-    chosen_user_agent = get_random_user_agent()
-
-    # Start Playwright
-    playwright = await async_playwright().start()
-    browser = await playwright.chromium.launch(headless=True)
-
-    if os.path.exists("browser-session.json"):
-        context = await browser.new_context(
-            user_agent=chosen_user_agent,
-            storage_state="browser-session.json",
-            viewport={"width": random.randint(800, 1920), "height": random.randint(400, 1080)},
-            bypass_csp=True  # Bypass Content Security Policy
-        )
-    else:
-        context = await browser.new_context(
-            user_agent=chosen_user_agent,
-            viewport={"width": random.randint(800, 1920), "height": random.randint(400, 1080)},
-            bypass_csp=True
-        )
-    
-    # Apply stealth to the browser context
-    page = await context.new_page()
-    await stealth_async(page)
+    # Apply stealth to every page
+    return await scrape_with_pages("insider", stocks, scrape_insider_ticker, concurrency,
+                                   setup_page=stealth_async, bypass_csp=True)
 
-    all_data = []
+def stream_insider_trades(stocks: list, concurrency: int = None):
+    '''scrape_insider_trades, yielding (index, ticker, result) as each ticker finishes'''
+    return stream_with_pages("insider", stocks, scrape_insider_ticker, concurrency,
+                             setup_page=stealth_async, bypass_csp=True)
 
-    for ticker in stocks:
-        url = f"http://openinsider.com/screener?s={ticker}&o=&pl=&ph=&ll=&lh=&fd=730&fdr=&td=0&tdr=&fdlyl=&fdlyh=&daysago=&xp=1&xs=1&vl=&vh=&ocl=&och=&sic1=-1&sicl=100&sich=9999&grp=0&nfl=&nfh=&nil=&nih=&nol=&noh=&v2l=&v2h=&oc2l=&oc2h=&sortcol=0&cnt=200&page=1"
-        try:
-            await page.goto(url)
-            await page.wait_for_load_state('networkidle')
+async def specific_stock(stock_code: str) -> List[Dict]:
+    """Scrape specific stock data from American Bulls website."""
+    url = f"https://www.americanbulls.com/SignalPage.aspx?lang=en&Ticker={stock_code}"
 
-            html = await page.content()
-        except Exception as e:
-            all_data.append({"ERROR": f"Could not fetch data for {ticker} due to {str(e)}"})
-            continue
-
-        soup = BeautifulSoup(html, "html.parser")
-        rows = soup.select("table tbody tr")
-
-        trades = []
-        for row in rows:
-            cells = row.select("td")
-
-            # Check if the row has enough columns to match the desired data
-            if len(cells) < 12:  # Adjust this number based on the minimum columns you expect
-                continue
-
-            dayFiled = cells[1].select_one("a").get_text(strip=True) if cells[1].select_one("a") else None
-            dayTraded = cells[2].get_text(strip=True) if cells[2] else None
-            insiderName = cells[4].select_one("a").get_text(strip=True) if cells[4].select_one("a") else None
-            title = cells[5].get_text(strip=True) if cells[5] else None
-            action = cells[6].get_text(strip=True) if cells[6] else None
-            price = cells[7].get_text(strip=True) if cells[7] else None
-            quantity = cells[8].get_text(strip=True) if cells[8] else None
-            sharesOwned = cells[9].get_text(strip=True) if cells[9] else None
-            deltaOwn = cells[10].get_text(strip=True) if cells[10] else None
-            value = cells[11].get_text(strip=True) if cells[11] else None
-            deltaDays = calculate_delta_days(dayFiled, dayTraded)
-
-            # Store the extracted data in a dictionary
-            extracted_data = {
-                "dayFiled": dayFiled,
-                "dayTraded": dayTraded,
-                "insiderName": insiderName,
-                "title": title,
-                "action": action,
-                "price": price,
-                "quantity": quantity,
-                "sharesOwned": sharesOwned,
-                "deltaOwn": deltaOwn,
-                "value": value,
-                "deltaDays" : deltaDays
-            }
-
-            if extracted_data["dayFiled"] is not None:
-                trades.append(extracted_data)
-
-        all_data.append({ticker: trades})
-
-    await context.storage_state(path="browser-session.json")
-    await browser.close()
-    await playwright.stop()
-    return all_data
+    try:
+        async with throttle.host_limiter("american_bulls"):
+            response = await http_client.http.get(url)
+        table_data = await parse(parsers.parse_american_bulls_signal, response.text)
+        if table_data is None:
+            print(f"ERROR table not found for stock: {stock_code}")
+            return []
+        return table_data
+
+    except Exception as e:
+        print(f"ERROR scraping specific stock data for {stock_code}: {str(e)}")
+        return []
 
 if __name__ == "__main__":
     stocks = ["AAPL", "TSLA", "AMZN", "GOOG"]
-    results = asyncio.run(scrape_insider_trades(stocks))
+    async def main():
+        #outside the API nothing else owns the pool, so start and drain it here
+        async with pool:
+            return await scrape_insider_trades(stocks)
+
+    results = asyncio.run(main())
     
     # Save the results to a JSON file
     with open("insider_trades_results.json", "w") as file:
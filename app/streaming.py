@@ -0,0 +1,66 @@
+"""Streaming responses for per-ticker results.
+
+Endpoints hand over an async iterator of JSON-able events and get back a
+StreamingResponse in one of two framings:
+
+  sse      Server-Sent Events (text/event-stream), one `data:` line per event,
+           with the event type taken from the event's "event" key
+  ndjson   newline-delimited JSON (application/x-ndjson), one object per line
+
+The format comes from ?format=, then the Accept header, defaulting to SSE.
+Nothing is buffered: each event is written as soon as it is produced.
+"""
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+SSE = "sse"
+NDJSON = "ndjson"
+
+MEDIA_TYPES = {
+    SSE: "text/event-stream",
+    NDJSON: "application/x-ndjson",
+}
+
+
+def negotiate(request: Request, format: Optional[str] = None) -> str:
+    if format in MEDIA_TYPES:
+        return format
+    accept = request.headers.get("accept", "")
+    if "application/x-ndjson" in accept or "application/jsonl" in accept:
+        return NDJSON
+    return SSE
+
+
+def _frame(event: dict, format: str) -> str:
+    data = json.dumps(event, default=str)
+    if format == NDJSON:
+        return data + "\n"
+    return f"event: {event.get('event', 'message')}\ndata: {data}\n\n"
+
+
+async def _encode(events: AsyncIterator[dict], format: str):
+    async for event in events:
+        yield _frame(event, format)
+
+
+def stream_events(request: Request, events: AsyncIterator[dict], format: Optional[str] = None) -> StreamingResponse:
+    format = negotiate(request, format)
+    return StreamingResponse(
+        _encode(events, format),
+        media_type=MEDIA_TYPES[format],
+        #keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def ticker_events(results, key: str, total: int):
+    '''(index, ticker, result) tuples from a scrapers.stream_* generator as result/done events'''
+    completed = 0
+    async for index, ticker, result in results:
+        completed += 1
+        yield {"event": "result", "index": index, "ticker": ticker, key: result,
+               "completed": completed, "total": total}
+    yield {"event": "done", "completed": completed, "total": total}
@@ -0,0 +1,136 @@
+"""Per-source concurrency and rate limits for the scrapers.
+
+Each scraped source gets a fan-out width (how many pages one scrape call keeps
+busy at once) plus a limiter for its host that is shared by every call in the
+process: a semaphore capping concurrent requests to the host and a token bucket
+capping the request rate. Together they replace the fixed random sleeps the
+scrapers used to take between pages.
+
+Defaults can be overridden per source with environment variables, e.g.
+SCRAPE_CONGRESS_CONCURRENCY=6, SCRAPE_CONGRESS_HOST_CONCURRENCY=8,
+SCRAPE_CONGRESS_RATE=1.5 (requests/second) and SCRAPE_CONGRESS_BURST=3.
+"""
+import asyncio
+import os
+import time
+
+#source: host, pages per scrape call, concurrent requests to the host, requests/second, burst
+DEFAULT_LIMITS = {
+    "congress": {"host": "www.quiverquant.com", "concurrency": 3, "host_concurrency": 4, "rate": 0.5, "burst": 2},
+    "market_beat": {"host": "www.marketbeat.com", "concurrency": 3, "host_concurrency": 4, "rate": 0.5, "burst": 2},
+    "insider": {"host": "openinsider.com", "concurrency": 4, "host_concurrency": 6, "rate": 1.0, "burst": 3},
+    "barchart": {"host": "www.barchart.com", "concurrency": 3, "host_concurrency": 4, "rate": 0.5, "burst": 2},
+    "american_bulls": {"host": "www.americanbulls.com", "concurrency": 4, "host_concurrency": 4, "rate": 2.0, "burst": 4},
+    "robinhood": {"host": "api.robinhood.com", "concurrency": 10, "host_concurrency": 10, "rate": 10.0, "burst": 10},
+}
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1):
+        #waiters queue on the lock so tokens are handed out in arrival order
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class HostLimiter:
+    """Caps concurrent requests to one host and paces them through a token bucket."""
+
+    def __init__(self, host: str, max_concurrent: int, rate: float, burst: float):
+        self.host = host
+        self.max_concurrent = max_concurrent
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._bucket = TokenBucket(rate, burst)
+        self.in_flight = 0
+        self.requests = 0
+        self.wait_seconds = 0.0
+
+    async def __aenter__(self):
+        started = time.monotonic()
+        await self._semaphore.acquire()
+        try:
+            await self._bucket.acquire()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        self.wait_seconds += time.monotonic() - started
+        self.in_flight += 1
+        self.requests += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "rate": self._bucket.rate,
+            "burst": self._bucket.capacity,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "avg_wait_seconds": round(self.wait_seconds / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+class SourceLimits:
+    def __init__(self, source: str, host: str, concurrency: int, host_concurrency: int, rate: float, burst: float):
+        self.source = source
+        self.host = host
+        self.concurrency = concurrency
+        self.host_concurrency = host_concurrency
+        self.rate = rate
+        self.burst = burst
+
+
+def _from_env(source: str, key: str, default):
+    value = os.getenv(f"SCRAPE_{source.upper()}_{key.upper()}")
+    return type(default)(value) if value else default
+
+
+_limits = {}
+_host_limiters = {}
+
+
+def limits(source: str) -> SourceLimits:
+    '''configured limits for a source (env overrides applied once, on first use)'''
+    if source not in _limits:
+        defaults = DEFAULT_LIMITS[source]
+        _limits[source] = SourceLimits(
+            source,
+            defaults["host"],
+            _from_env(source, "concurrency", defaults["concurrency"]),
+            _from_env(source, "host_concurrency", defaults["host_concurrency"]),
+            _from_env(source, "rate", float(defaults["rate"])),
+            _from_env(source, "burst", float(defaults["burst"])),
+        )
+    return _limits[source]
+
+
+def host_limiter(source: str) -> HostLimiter:
+    '''process-wide limiter for the host a source scrapes'''
+    config = limits(source)
+    if config.host not in _host_limiters:
+        _host_limiters[config.host] = HostLimiter(config.host, config.host_concurrency, config.rate, config.burst)
+    return _host_limiters[config.host]
+
+
+def stats() -> dict:
+    return {host: limiter.stats() for host, limiter in _host_limiters.items()}
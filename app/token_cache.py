@@ -0,0 +1,99 @@
+"""Cache of verified Firebase ID tokens.
+
+The dashboard sends the same bearer token on every request (six at once on
+load), and each one used to pay for a full signature check. Verified claims
+are kept under a hash of the token until the token's own `exp`, with an LRU
+cap on the number of entries, so a token is verified once per process for
+its lifetime. Verification only goes through firebase_admin's public
+verify_id_token, which keeps Google's signing certificates in its own
+cache-control aware session.
+
+Users whose users/{email} document is known to exist are remembered in a
+second LRU (TOKEN_CACHE_MAX_USERS), so get_current_user skips the
+create-if-missing check for them.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from firebase_admin import auth as firebase_auth
+
+logger = logging.getLogger("token_cache")
+
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+TOKEN_CACHE_MAX_USERS = int(os.getenv("TOKEN_CACHE_MAX_USERS", "10000"))
+
+
+def _token_key(id_token: str) -> str:
+    return hashlib.sha256(id_token.encode("utf-8")).hexdigest()
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES, max_users: int = TOKEN_CACHE_MAX_USERS):
+        self.max_entries = max_entries
+        self.max_users = max_users
+        self._entries = OrderedDict()  #sha256(token) -> decoded claims
+        self._known_users = OrderedDict()  #emails whose users/{email} document is known to exist, LRU
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def verify(self, id_token: str) -> dict:
+        '''decoded claims for a token, verifying it with firebase only on a miss'''
+        key = _token_key(id_token)
+        now = time.time()
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is not None:
+                if claims.get("exp", 0) > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(claims)
+                del self._entries[key]
+                self.expired += 1
+
+        #raises on invalid/expired/revoked tokens; failures are never cached
+        claims = firebase_auth.verify_id_token(id_token)
+        with self._lock:
+            self.misses += 1
+            if claims.get("exp", 0) > time.time():
+                self._entries[key] = claims
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return dict(claims)
+
+    def is_known_user(self, email: str) -> bool:
+        with self._lock:
+            if email not in self._known_users:
+                return False
+            self._known_users.move_to_end(email)
+            return True
+
+    def mark_known_user(self, email: str):
+        '''the user's document exists; skip the create-if-missing check from now on'''
+        with self._lock:
+            self._known_users[email] = True
+            self._known_users.move_to_end(email)
+            while len(self._known_users) > self.max_users:
+                self._known_users.popitem(last=False)
+
+    def forget_user(self, email: str):
+        with self._lock:
+            self._known_users.pop(email, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+        }
+
+
+#shared instance used by get_current_user
+verified_tokens = VerifiedTokenCache()
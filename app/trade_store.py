@@ -0,0 +1,156 @@
+"""Local append-only store of scraped congress and insider trades.
+
+The congress and insider scrapers used to return a ticker's whole trade
+history on every call and keep nothing. Every trade row they see is now kept
+in a SQLite file, keyed by (source, ticker, dedupe key): the row's
+identifying fields (parsers.TRADE_KEY_FIELDS, e.g. filed date, insider and
+quantity for openinsider). Rows are only ever inserted, never updated, and
+each remembers when it was first seen, so "what's new since T" is an index
+range scan.
+
+The scrapers hand stored keys (known_keys) to the parsers, which skip rows
+already stored. openinsider is only asked for the days since the newest
+stored filing plus a short overlap for late filings, so its payloads follow
+the number of new trades rather than the length of the history; the congress
+page isn't ordered by filing date, so it is always read whole.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from parsers import trade_keys
+
+logger = logging.getLogger("trade_store")
+
+STORE_PATH = os.getenv("TRADE_STORE_PATH", "trades.sqlite3")
+#how many of a ticker's newest keys the parsers check rows against
+KNOWN_KEYS = int(os.getenv("TRADE_STORE_KNOWN_KEYS", "200"))
+#SQLite's default limit on bound parameters per statement
+MAX_QUERY_PARAMS = 900
+
+
+class TradeStore:
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS trades (
+                source TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                key TEXT NOT NULL,
+                seen_at REAL NOT NULL,
+                position INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (source, ticker, key)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS trades_by_time ON trades (source, ticker, seen_at, position);
+            CREATE TABLE IF NOT EXISTS trade_syncs (
+                source TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                synced_at REAL,
+                PRIMARY KEY (source, ticker)
+            );
+        """)
+        self._conn.commit()
+        self.appends = 0
+        self.rows_added = 0
+        self.duplicates = 0
+
+    def known_keys(self, source: str, ticker: str, limit: Optional[int] = KNOWN_KEYS) -> set:
+        '''keys of the ticker's most recently seen trades (all of them with limit=None)'''
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM trades WHERE source = ? AND ticker = ? ORDER BY seen_at DESC, position LIMIT ?",
+                (source, ticker.upper(), -1 if limit is None else limit),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def newest(self, source: str, ticker: str) -> Optional[dict]:
+        '''the ticker's most recently seen trade'''
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM trades WHERE source = ? AND ticker = ? ORDER BY seen_at DESC, position LIMIT 1",
+                (source, ticker.upper()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def append(self, source: str, ticker: str, trades: List[dict]) -> int:
+        '''add the rows of one scrape (newest first) that aren't stored yet; returns how many were new'''
+        ticker = ticker.upper()
+        keyed = list(zip(trade_keys(source, trades), trades))
+        with self._lock, self._conn:
+            #stamped under the lock, so every row seen_at <= watermark() is committed once it returns
+            now = time.time()
+            rows = [(source, ticker, key, now, position, json.dumps(trade)) for position, (key, trade) in enumerate(keyed)]
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO trades VALUES (?, ?, ?, ?, ?, ?)", rows)
+            added = self._conn.total_changes - before
+            self._conn.execute("INSERT OR REPLACE INTO trade_syncs VALUES (?, ?, ?)", (source, ticker, now))
+        self.appends += 1
+        self.rows_added += added
+        self.duplicates += len(rows) - added
+        if added:
+            logger.info(f"Stored {added} new {source} trade(s) for {ticker}")
+        return added
+
+    def watermark(self) -> float:
+        '''a time every append stamped at or before it has already finished'''
+        with self._lock:
+            return time.time()
+
+    def trades(self, source: str, ticker: str, since: Optional[float] = None, limit: Optional[int] = None,
+               until: Optional[float] = None) -> List[dict]:
+        '''the ticker's trades, newest first; only those first seen after `since` and up to `until`
+        (epoch seconds) if given'''
+        query = "SELECT data FROM trades WHERE source = ? AND ticker = ?"
+        params = [source, ticker.upper()]
+        if since is not None:
+            query += " AND seen_at > ?"
+            params.append(since)
+        if until is not None:
+            query += " AND seen_at <= ?"
+            params.append(until)
+        query += " ORDER BY seen_at DESC, position"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def synced_at(self, source: str, tickers: List[str]) -> Dict[str, float]:
+        '''when each ticker was last scraped into the store; tickers never scraped are left out'''
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        found = {}
+        with self._lock:
+            for start in range(0, len(tickers), MAX_QUERY_PARAMS):
+                chunk = tickers[start:start + MAX_QUERY_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self._conn.execute(
+                    f"SELECT ticker, synced_at FROM trade_syncs WHERE source = ? AND ticker IN ({placeholders})",
+                    [source] + chunk,
+                ).fetchall())
+        return found
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT source, COUNT(*) FROM trades GROUP BY source").fetchall())
+            tickers = self._conn.execute("SELECT COUNT(*) FROM trade_syncs").fetchone()[0]
+        return {
+            "path": self.path,
+            "trades": counts,
+            "tickers": tickers,
+            "appends": self.appends,
+            "rows_added": self.rows_added,
+            "duplicates": self.duplicates,
+        }
+
+
+#shared instance used by the congress and insider scrapers
+store = TradeStore()
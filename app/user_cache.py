@@ -0,0 +1,94 @@
+"""Short-lived cache of users/{email} documents.
+
+Nearly every endpoint needs the caller's user document, and the dashboard
+fires several requests at once on load. Reads go through two layers:
+
+  * request scope: the document is read once per request and kept on
+    request.state, so get_current_user and the endpoint share it;
+  * process scope: documents are kept for USER_DOC_TTL seconds, so parallel
+    requests from the same page view share one read.
+
+Endpoints that change the document write through (update/invalidate) so the
+cache never serves a watchlist older than the caller's own last write.
+"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+USER_DOC_TTL = float(os.getenv("USER_DOC_TTL", "30"))
+USER_DOC_MAX_ENTRIES = int(os.getenv("USER_DOC_MAX_ENTRIES", "10000"))
+
+
+class UserDocCache:
+    def __init__(self, db, ttl: float = USER_DOC_TTL, max_entries: int = USER_DOC_MAX_ENTRIES):
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  #email -> (expires_at, doc or None if it doesn't exist)
+        self._lock = threading.Lock()
+        self.firestore_reads = 0
+        self.process_hits = 0
+        self.request_hits = 0
+
+    def _store(self, email: str, doc: Optional[dict]):
+        self._entries[email] = (time.monotonic() + self.ttl, doc)
+        self._entries.move_to_end(email)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, email: str) -> Optional[dict]:
+        '''the user's document (a private copy), or None if it doesn't exist'''
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is not None and entry[0] > time.monotonic():
+                self.process_hits += 1
+                return copy.deepcopy(entry[1])
+
+        snapshot = self.db.collection("users").document(email).get()
+        doc = snapshot.to_dict() if snapshot.exists else None
+        with self._lock:
+            self.firestore_reads += 1
+            self._store(email, doc)
+        return copy.deepcopy(doc)
+
+    def for_request(self, request, email: str) -> Optional[dict]:
+        '''get(), but at most once per request'''
+        if hasattr(request.state, "user_doc"):
+            self.request_hits += 1
+        else:
+            request.state.user_doc = self.get(email)
+        return request.state.user_doc
+
+    def set(self, email: str, doc: dict):
+        '''write-through after replacing the whole document'''
+        with self._lock:
+            self._store(email, copy.deepcopy(doc))
+
+    def update(self, email: str, fields: dict):
+        '''write-through after user_ref.update(fields) / set(fields, merge=True)'''
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None or entry[1] is None or entry[0] <= time.monotonic():
+                #nothing (usable) cached; the next read fetches the merged document
+                self._entries.pop(email, None)
+                return
+            doc = dict(entry[1])
+            doc.update(copy.deepcopy(fields))
+            self._store(email, doc)
+
+    def invalidate(self, email: str):
+        with self._lock:
+            self._entries.pop(email, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl,
+            "firestore_reads": self.firestore_reads,
+            "process_hits": self.process_hits,
+            "request_hits": self.request_hits,
+            "reads_saved": self.process_hits + self.request_hits,
+        }
@@ -0,0 +1,217 @@
+"""Process pool for the CPU-heavy stages.
+
+The API is one uvicorn process, so page parsing, the stochastic panel and
+building the columnar insider response all used to share one interpreter (and
+one GIL) with the event loop. run() hands such a stage to a pool of worker
+processes instead. Plain JSON bodies are not worth it: pickling a payload to
+a worker costs about as much as encoding it, so encode_json runs in-process,
+on orjson when it is installed.
+
+  * WORKER_PROCESSES workers (default: one per core, at most
+    DEFAULT_MAX_PROCESSES). Each spawned worker is a full interpreter with
+    pandas and numpy loaded, so memory grows with the count; raise
+    WORKER_PROCESSES on hosts with the memory for it. Workers are started with
+    WORKER_START_METHOD ("spawn" by default: the API process has threads and a
+    browser, which don't survive a fork). Every worker imports
+    WORKER_WARM_MODULES once when it starts, and start() spins all of them up
+    before the first request, so no request pays for process start-up or for
+    importing pandas.
+  * Backpressure: at most WORKER_MAX_PENDING stages are submitted to the pool
+    at once (default: two per worker). Further callers wait their turn without
+    submitting, so a burst can't queue unbounded work (and pickled pages)
+    inside the executor.
+  * stats(): callers waiting for a slot, stages queued and running in the
+    pool, completions, failures and average wait/run times.
+
+Submitted functions and their arguments must be picklable (module-level
+functions such as the parsers). Until the pool is started, or with
+WORKER_PROCESSES=0, run() falls back to a thread so standalone scripts work
+unchanged.
+"""
+import asyncio
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from typing import Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("workers")
+
+#default cap on the pool size; WORKER_PROCESSES overrides it
+DEFAULT_MAX_PROCESSES = 4
+PROCESSES = int(os.getenv("WORKER_PROCESSES", str(min(DEFAULT_MAX_PROCESSES, os.cpu_count() or 1))))
+MAX_PENDING = int(os.getenv("WORKER_MAX_PENDING", str(max(PROCESSES, 1) * 2)))
+START_METHOD = os.getenv("WORKER_START_METHOD", "spawn")
+WARM_MODULES = tuple(
+    m.strip() for m in os.getenv("WORKER_WARM_MODULES", "parsers,indicators,columnar,pandas,numpy").split(",") if m.strip()
+)
+
+
+def _warm_up(modules):
+    '''worker initializer: import what the stages need once per process'''
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f"Worker {os.getpid()} could not import {module}: {e}")
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_json(content) -> bytes:
+    '''the body FastAPI's JSONResponse would send for content (orjson writes NaN as null instead of failing)'''
+    if orjson is not None:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+class WorkerPool:
+    def __init__(self, processes: int = PROCESSES, max_pending: int = MAX_PENDING,
+                 warm_modules: tuple = WARM_MODULES, start_method: str = START_METHOD):
+        self.processes = processes
+        self.max_pending = max(max_pending, 1)
+        self.warm_modules = warm_modules
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        #slots are per event loop, like the http client's connections
+        self._slots: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.in_flight = 0
+        self.submitted = 0
+        self.saturated = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+        self.by_function: Dict[str, int] = {}
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_warm_up,
+            initargs=(self.warm_modules,),
+        )
+
+    def _slots_for_loop(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_pending)
+        return slots
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    async def start(self):
+        if self._executor is not None or self.processes <= 0:
+            return
+        self._executor = self._new_executor()
+        #spin every worker up (and through its imports) now rather than on the first request
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        pids = await asyncio.gather(*(loop.run_in_executor(self._executor, _ready) for _ in range(self.processes)))
+        logger.info(f"Started {len(set(pids))} worker process(es) in {time.perf_counter() - started:.2f}s")
+
+    async def stop(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+        self._slots.clear()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def run(self, func, *args):
+        '''func(*args) in a worker process, waiting for a free slot first if the pool is saturated'''
+        if self._executor is None:
+            return await asyncio.to_thread(func, *args)
+
+        slots = self._slots_for_loop()
+        if slots.locked():
+            self.saturated += 1
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        queued_at = time.perf_counter()
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.wait_seconds += started - queued_at
+        self.in_flight += 1
+        self.submitted += 1
+        name = getattr(func, "__name__", repr(func))
+        self.by_function[name] = self.by_function.get(name, 0) + 1
+        executor = self._executor
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+            self.completed += 1
+            return result
+        except BrokenProcessPool:
+            #a worker died (e.g. killed for memory); replace the pool so later stages still run
+            self.failed += 1
+            if self._executor is executor:
+                self.restarts += 1
+                logger.error("Worker pool broke; starting a new one")
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._new_executor()
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.run_seconds += time.perf_counter() - started
+            slots.release()
+
+    def stats(self) -> dict:
+        finished = (self.completed + self.failed) or 1
+        return {
+            "running": self.running,
+            "processes": self.processes if self.running else 0,
+            "max_pending": self.max_pending,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            #submitted but not yet picked up by a worker
+            "queued": max(self.in_flight - self.processes, 0),
+            "peak_waiting": self.peak_waiting,
+            "submitted": self.submitted,
+            "saturated": self.saturated,
+            "completed": self.completed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "avg_wait_ms": round(self.wait_seconds / (self.submitted or 1) * 1000, 2),
+            "avg_run_ms": round(self.run_seconds / finished * 1000, 2),
+            "by_function": dict(self.by_function),
+        }
+
+
+#shared instance, started and stopped in main's lifespan
+cpu_workers = WorkerPool()
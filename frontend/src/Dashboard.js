@@ -60,20 +60,21 @@ const Dashboard = () => {
 
   const fetchAnalysisData = async () => {
     try {
-      const [analysisRes, bullRes, barchartRes, marketBeatRes, congressTradesRes, insiderTradesRes] = await Promise.all([
-        axiosInstance.get('/stock_analysis'),
-        axiosInstance.get('/american_bull_info'),
-        axiosInstance.get('/barchart_opinion_info'),
-        axiosInstance.get('/market_beat_info'),
-        axiosInstance.get('/congress_trades'),
-        axiosInstance.get('/insider_trades')
-      ]);
-      setStockAnalysisData(analysisRes.data.stock_analysis);
-      setAmericanBullData(bullRes.data.american_bull_info);
-      setBarchartOpinionData(barchartRes.data.barchart_opinion_info);
-      setMarketBeatData(marketBeatRes.data.market_beat_info);
-      setCongressTrades(congressTradesRes.data.congress_trades);
-      setInsiderTrades(insiderTradesRes.data.insider_trades);
+      // One request for every source; sources that timed out come back as null
+      const { data } = await axiosInstance.get('/dashboard');
+      const keep = (value, setter) => {
+        if (value !== null && value !== undefined) setter(value);
+      };
+      keep(data.stock_analysis, setStockAnalysisData);
+      keep(data.american_bull_info, setAmericanBullData);
+      keep(data.barchart_opinion_info, setBarchartOpinionData);
+      keep(data.market_beat_info, setMarketBeatData);
+      keep(data.congress_trades, setCongressTrades);
+      keep(data.insider_trades, setInsiderTrades);
+      if (data.partial) {
+        const missing = Object.keys(data.sources).filter((name) => data.sources[name].status !== 'ok');
+        setError(`Some data is still loading or unavailable: ${missing.join(', ')}`);
+      }
     } catch (err) {
       console.error('Error fetching analysis data:', err);
       setError('Failed to fetch analysis data.');
@@ -87,6 +88,18 @@ const Dashboard = () => {
       setMessage('');
       const res = await axiosInstance.post('/execute_analysis');
       setMessage(res.data.status);
+
+      // Analysis runs as a background job; poll it until it finishes
+      const jobId = res.data.job_id;
+      while (jobId) {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const job = (await axiosInstance.get(`/analysis_jobs/${jobId}`)).data;
+        if (job.status === 'done' || job.status === 'failed') {
+          setMessage(job.status === 'done' ? 'Analysis executed' : `Analysis failed: ${job.error}`);
+          break;
+        }
+        setMessage(`Analyzing... ${job.completed}/${job.total}`);
+      }
       await fetchAnalysisData();
     } catch (err) {
       console.error('Error executing analysis:', err);